@@ -1,52 +1,90 @@
 import argparse
+import contextlib
+import io
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 
 from src._tokenizer import Tokenizer
 from src.utils.tools import readYalFile, str2bool, str2file
-from src.utils.patterns import ID, WS, EQ, EXPR, COMMENT, RETURN, LET, OPERATOR, GROUP, RULE, OR, CHAR
+from src.utils.patterns import ID, WS, EQ, EXPR, COMMENT, RETURN, LET, OPERATOR, GROUP, RULE, OR, CHAR, precompile
 from src.utils.constants import IDENT, VALUE, MATCH, EXIST, EXTRACT_REMINDER
 from src._yal_seq import YalSequencer as YalSeq
 from src._expression import Expression
-from src._ast import AbstractSyntaxTree as AST
+from src._ast import AbstractSyntaxTree as AST, FlatAbstractSyntaxTree as FlatAST
+from src._generator import LexerGenerator
+from src.utils.instrumentation import instrumentation
 
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'batch':
+        batch(sys.argv[2:])
+        return
+
     parser = argparse.ArgumentParser(description="Process some integers.")
     parser.add_argument('file_path', type=str2file, help='The file path')
     parser.add_argument('dir_name', type=str, help='The directory name')
     parser.add_argument('draw_subtrees', type=str2bool,
                         help='A boolean flag to draw the subtrees or not.')
+    parser.add_argument('--generate', type=str, metavar='OUTPUT', default=None,
+                        help='Write a standalone scanner module for the rule to OUTPUT.')
+    parser.add_argument('--no-render', dest='render', action='store_false',
+                        help='Do not render the final AST.')
+    parser.add_argument('--instrument', action='store_true',
+                        help='Report the time of each phase and the counters of the pipeline.')
+    parser.add_argument('--instrument-format', type=str, choices=['table', 'json'], default='table',
+                        help='Format of the --instrument report, a table (default) or JSON.')
 
     args = parser.parse_args()
 
+    if args.instrument:
+        instrumentation.enable()
+    with instrumentation.span('app.total'):
+        run(args)
+    if args.instrument:
+        instrumentation.printReport(args.instrument_format)
+
+
+def run(args: argparse.Namespace):
+    '''
+    This function runs the whole pipeline over the .yal file of the arguments.
+    Returns:
+    - True if the pipeline completed, False if it stopped at some phase.
+    '''
     file_path = args.file_path
     dir_name = args.dir_name
     draw_subtrees = args.draw_subtrees
 
-    fileContent = readYalFile(file_path)
+    with instrumentation.span('app.read'):
+        fileContent = readYalFile(file_path)
     print(f'✔ File read successfully from {file_path}')
 
-    lexer = Tokenizer(fileContent)
-    lexer.addPatterns([COMMENT, WS, ID, EQ, EXPR, RETURN])
-    lexer.tokenize()
+    with instrumentation.span('app.tokenize'):
+        lexer = Tokenizer(fileContent)
+        # The comments are matched, but never become symbols. The actions are kept, they are only part of the rule
+        lexer.addPatterns([COMMENT], skip=True)
+        lexer.addPatterns([WS, ID, EQ, EXPR, RETURN])
+        lexer.tokenize()
 
     if lexer.errorsManager.haveErrors():
         lexer.errorsManager.printErrors(
             '✖ Tokens has not been generated successfully')
-        return
+        return False
 
     if len(lexer.symbolsTable) == 0:
         print('✖ No tokens generated')
         print('\tError: No tokens generated')
         print('\tSuggestion: Check your .yal file have some content to be tokenized')
-        return
+        return False
 
     print('✔ Tokens has been generated successfully:')
     for idx, symbol in enumerate(lexer.symbolsTable):
         print(f'\t[{idx}] {symbol}')
 
-    lexer.removeSymbols([COMMENT, RETURN])
-
     yal_let = YalSeq(
         lexer,
         [
@@ -62,10 +100,11 @@ def main():
         ID
     )
 
-    yal_let.extractIdent()
+    with instrumentation.span('app.let_extraction'):
+        yal_let.extractIdent()
     if yal_let.errorsManager.haveErrors():
         yal_let.errorsManager.printErrors('✖ Identities extraction failed')
-        return
+        return False
     print('✔ Identities extraction successful')
 
     if draw_subtrees:
@@ -74,10 +113,11 @@ def main():
         else:
             print('✔ Drawing subtrees:')
             for idx, ident in enumerate(yal_let.idents.keys()):
-                this_expression: Expression = Expression(yal_let.idents[ident])
-                this_expression.hardProcess()
-                this_ast: AST = AST(this_expression.infixRegEx)
-                this_ast.draw(ident, dir_name, ident, False)
+                with instrumentation.span('app.subtrees'):
+                    this_expression: Expression = Expression(yal_let.idents[ident])
+                    this_expression.hardProcess()
+                    this_ast: AST = AST(this_expression.infixRegEx)
+                    this_ast.draw(ident, dir_name, ident, False)
                 print(f'\t[{idx}] \"{ident}\" AST has been drawn successfully')
     else:
         print('✔ Subtrees drawing skipped, as per user request')
@@ -96,17 +136,18 @@ def main():
         None
     )
 
-    yal_rule.extractIdent()
+    with instrumentation.span('app.rule_extraction'):
+        yal_rule.extractIdent()
 
     if yal_rule.errorsManager.haveErrors():
         yal_rule.errorsManager.printErrors(
             '✖ Rule extraction failed')
-        return
+        return False
     elif len(yal_rule.reminders) == 0:
         print('✖ No rule found')
         print('\tError: No rule found')
         print('\tSuggestion: Check you have a rule defined in your .yal file')
-        return
+        return False
     print('✔ Rule extraction successful')
 
     print('✔ Building the final AST')
@@ -118,31 +159,238 @@ def main():
     final_expression: list = []
 
     for symbol in rule_lexer.symbolsTable:
-        if symbol.type == ID.name:
-            get_original = yal_let.idents.get(symbol.original, None)
-            if get_original:
-                final_expression.extend(yal_let.idents[symbol.original])
+        if symbol.type == RETURN.name:
+            continue
+        elif symbol.type == ID.name:
+            reference = yal_let.references.get(symbol.original, None)
+            if reference:
+                final_expression.append(reference)
             else:
                 print(f'✖ Final expression building failed:')
                 print(f'\tError: \"{symbol.original}\" is not defined')
                 print(f'\tSuggestion: Check the rule definition on your .yal file')
-                return
+                return False
         else:
             final_expression.extend(symbol.original)
 
-    final_expression: Expression = Expression(final_expression)
-    final_expression.hardProcess()
+    with instrumentation.span('app.expression'):
+        final_expression: Expression = Expression(final_expression)
+        final_expression.hardProcess()
 
-    final_ast: AST = AST(final_expression.infixRegEx)
+    with instrumentation.span('app.ast'):
+        # The expression is only validated, each definition once, the trees are built by the generator and to render
+        final_tree: FlatAST = FlatAST()
+        final_tree.validate(final_expression.infixRegEx)
 
-    if final_ast.errorsManager.haveErrors():
-        final_ast.errorsManager.printErrors('✖ Final AST building failed')
+    if final_tree.errorsManager.haveErrors():
+        final_tree.errorsManager.printErrors('✖ Final AST building failed')
         print('\tSuggestion: Check the rule definition on your .yal file')
-        return
+        return False
+
+    if args.generate:
+        with instrumentation.span('app.generate'):
+            generator = LexerGenerator(LexerGenerator.splitRule(
+                rule_lexer.symbolsTable, yal_let.references, EXPR.name, RETURN.name))
+            generator.write(args.generate, file_path)
+        if generator.errorsManager.haveErrors():
+            generator.errorsManager.printErrors(
+                '✖ Some actions are not supported')
+            print(f'✖ Scanner has been generated partially to {args.generate}, the lexemes of those alternatives are skipped')
+            print('\tSuggestion: Check the actions of the rule on your .yal file')
+            return False
+        print(f'✔ Scanner has been generated successfully to {args.generate}')
 
-    final_ast.draw('final_ast', dir_name, 'Final AST', False)
-    print('✔ Final AST building and rendering has been completed successfully')
+    if args.render:
+        with instrumentation.span('app.render'):
+            # The drawn tree shares the subtree of each definition among its uses
+            final_ast: AST = AST(final_expression.infixRegEx)
+            final_ast.draw('final_ast', dir_name, 'Final AST', False)
+        print('✔ Final AST building and rendering has been completed successfully')
+    else:
+        print('✔ Final AST building has been completed successfully, rendering skipped')
     print('✔ All Done!')
+    return True
+
+
+'''
+↓↓ BATCH ↓↓
+'''
+
+
+def initBatchWorker(instrument: bool):
+    '''
+    This function is made for warm, once per process, the workers of the batch: the automata of the patterns are built before the first file.
+    '''
+    if instrument:
+        instrumentation.enable()
+    precompile()
+
+
+def compileYalFile(job: tuple) -> dict:
+    '''
+    This function is made for run the whole pipeline over a .yal file inside a worker of the batch, its output is captured.
+    Parameters:
+    - job: The .yal file, the file of its scanner (None to not generate it), the directory name of its renders, and if the final AST is rendered.
+    Returns:
+    - The status of the file: if the pipeline completed, its time, its output, and the spans and counters when instrumented.
+    '''
+    file_path, generate, dir_name, render = job
+    args = argparse.Namespace(file_path=file_path, dir_name=dir_name, draw_subtrees=False,
+                              generate=generate, render=render)
+    output = io.StringIO()
+    error = None
+    instrumentation.reset()
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(output):
+            with instrumentation.span('app.total'):
+                completed = run(args)
+    except Exception as e:
+        completed = False
+        error = repr(e)
+    return {
+        'file': file_path,
+        'ok': completed,
+        'seconds': time.perf_counter() - start,
+        'generated': generate if completed else None,
+        'error': error,
+        'output': output.getvalue(),
+        'instrumentation': instrumentation.report() if instrumentation.enabled else None,
+    }
+
+
+def collectYalFiles(paths: list[str]) -> list[tuple[str, str]]:
+    '''
+    This function returns the .yal files of the paths, directories are searched recursively. A file found more than once is kept once.
+    The name of a file is its path relative to the directory it was found in, it names the outputs of the file, so two files can not share it.
+    Returns:
+    - Pairs of file and name.
+    '''
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for file in sorted(glob.glob(os.path.join(path, '**', '*.yal'), recursive=True)):
+                found.append((file, os.path.relpath(file, path)))
+        elif os.path.isfile(path):
+            found.append((path, os.path.basename(path)))
+        else:
+            raise argparse.ArgumentTypeError(f'File {path} does not exist')
+
+    files = []
+    seen = set()
+    owners = {}
+    for file, name in found:
+        real = os.path.realpath(file)
+        if real in seen:
+            continue
+        seen.add(real)
+        stem = os.path.splitext(name)[0]
+        if stem in owners:
+            raise argparse.ArgumentTypeError(
+                f'Files {owners[stem]} and {file} would both be written as {stem}')
+        owners[stem] = file
+        files.append((file, name))
+    return files
+
+
+def batch(argv: list[str]):
+    '''
+    This function runs the whole pipeline over many .yal files across a pool of processes, it reports the status of each file as it completes and a summary at the end.
+    Parameters:
+    - argv: The arguments after the batch subcommand.
+    '''
+    parser = argparse.ArgumentParser(prog='app.py batch',
+                                     description='Run the pipeline over many .yal files at once.')
+    parser.add_argument('paths', type=str, nargs='+',
+                        help='.yal files, or directories searched recursively for them.')
+    parser.add_argument('--generate-dir', type=str, metavar='OUTPUT_DIR', default=None,
+                        help='Write the scanner module of each file to OUTPUT_DIR, keeping the layout of the directories.')
+    parser.add_argument('--render', action='store_true',
+                        help='Render the final AST of each file.')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Amount of processes, the amount of CPUs by default.')
+    parser.add_argument('--report', type=str, metavar='OUTPUT', default=None,
+                        help='Write the status of every file and the summary as JSON to OUTPUT.')
+    parser.add_argument('--instrument', action='store_true',
+                        help='Report the time of each phase and the counters of the pipeline over all the files.')
+    parser.add_argument('--instrument-format', type=str, choices=['table', 'json'], default='table',
+                        help='Format of the --instrument report, a table (default) or JSON.')
+    args = parser.parse_args(argv)
+
+    try:
+        files = collectYalFiles(args.paths)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    if not files:
+        print('✖ No .yal files found')
+        sys.exit(1)
+
+    jobs = []
+    for file_path, name in files:
+        stem = os.path.splitext(name)[0]
+        generate = None
+        if args.generate_dir:
+            generate = os.path.join(args.generate_dir, stem + '.py')
+            os.makedirs(os.path.dirname(generate), exist_ok=True)
+        jobs.append((file_path, generate, stem, args.render))
+
+    workers = min(args.workers or os.cpu_count() or 1, len(jobs))
+    start = time.perf_counter()
+    results = []
+
+    def report(result: dict):
+        results.append(result)
+        status = '✔' if result['ok'] else '✖'
+        target = f' -> {result["generated"]}' if result['generated'] else ''
+        print(f'{status} [{len(results)}/{len(jobs)}] {result["file"]} ({result["seconds"]:.3f} s){target}')
+        if not result['ok']:
+            if result['error']:
+                print(f'\tError: {result["error"]}')
+            # The pipeline explains why it stopped from its first failure on
+            output = result['output']
+            failure = output.find('✖')
+            if failure >= 0:
+                for line in output[failure:].splitlines():
+                    print(f'\t{line}')
+
+    if workers == 1:
+        initBatchWorker(args.instrument)
+        for job in jobs:
+            report(compileYalFile(job))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=initBatchWorker, initargs=(args.instrument,)) as executor:
+            futures = [executor.submit(compileYalFile, job) for job in jobs]
+            for future in as_completed(futures):
+                report(future.result())
+
+    elapsed = time.perf_counter() - start
+    # The summary follows the order of the files, not the order they completed in
+    order = {job[0]: idx for idx, job in enumerate(jobs)}
+    results.sort(key=lambda result: order[result['file']])
+    failed = [result['file'] for result in results if not result['ok']]
+    busy = sum(result['seconds'] for result in results)
+    print(f'{"✖" if failed else "✔"} {len(results) - len(failed)} of {len(results)} files completed in {elapsed:.3f} s, {busy:.3f} s of work across {workers} workers')
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump({
+                'files': results,
+                'completed': len(results) - len(failed),
+                'failed': failed,
+                'seconds': elapsed,
+                'workers': workers,
+            }, f, indent=2)
+        print(f'✔ Report written to {args.report}')
+
+    if args.instrument:
+        instrumentation.reset()
+        for result in results:
+            if result['instrumentation']:
+                instrumentation.merge(result['instrumentation'])
+        instrumentation.printReport(args.instrument_format)
+
+    if failed:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
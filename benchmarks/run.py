@@ -0,0 +1,363 @@
+"""
+@File name: run.py
+@Module: Benchmarks
+@Description: This file contains the micro-benchmarks of every stage of the pipeline, over the input/*.yal files and synthetic workloads.
+Usage, from the root of the repository:
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --baseline results.json --fail-on-regression
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import timeit
+
+from src._expression import Expression
+from src._ast import AbstractSyntaxTree as AST, FlatAbstractSyntaxTree as FlatAST
+from src._dir_dfa import DirectDeterministicFiniteAutomaton as DirDFA
+from src._min_dfa import MinimizedDeterministicFiniteAutomaton as MinDFA
+from src._tokenizer import Tokenizer
+from src._yal_seq import YalSequencer as YalSeq
+from src.utils.patterns import Pattern, ID, WS, EQ, EXPR, COMMENT, RETURN, LET, OPERATOR, GROUP, CHAR, STR
+from src.utils.constants import IDENT, VALUE, MATCH, EXIST, CACHE_DIR_ENV
+from src.utils.tools import readYalFile
+
+# The lexer of the .yal files, as app.py builds it: comments are matched but never become symbols
+SKIPPED_PATTERNS = [COMMENT]
+LEXER_PATTERNS = [WS, ID, EQ, EXPR, RETURN]
+
+
+class Benchmark(object):
+    '''
+    This class represents a benchmark, a stage of the pipeline over a workload.
+    '''
+
+    def __init__(self, stage: str, workload: str, setup):
+        '''
+        This is the constructor of the class.
+        Parameters:
+        - stage: The name of the stage of the pipeline.
+        - workload: The name of the workload.
+        - setup: A function that prepares the workload, out of the timing, and returns the function to time.
+        '''
+        self.stage: str = stage
+        self.workload: str = workload
+        self.setup = setup
+
+    @property
+    def name(self) -> str:
+        return f'{self.stage}/{self.workload}'
+
+    def run(self, repeat: int, number: int) -> dict:
+        '''
+        This function times the benchmark.
+        Returns:
+        - The seconds per call of each repetition, and their summary.
+        '''
+        function = self.setup()
+        timings = [total / number for total in timeit.Timer(
+            function).repeat(repeat, number)]
+        return {
+            'name': self.name,
+            'stage': self.stage,
+            'workload': self.workload,
+            'repeat': repeat,
+            'number': number,
+            'timings': timings,
+            'min': min(timings),
+            'median': statistics.median(timings),
+            'mean': statistics.mean(timings),
+            'stdev': statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        }
+
+
+'''
+↓↓ WORKLOADS ↓↓
+'''
+
+
+def yalFiles() -> dict:
+    '''
+    This function returns the content of the input/*.yal files, by file name.
+    '''
+    files = sorted(glob.glob('input/**/*.yal', recursive=True))
+    return {os.path.relpath(file, 'input'): readYalFile(file) for file in files}
+
+
+def syntheticYal(rng: random.Random, size: int) -> str:
+    '''
+    This function returns a .yal file with size definitions and a rule with size alternatives.
+    '''
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    names = []
+    lines = ['(* Synthetic lexer *)', '']
+    for idx in range(size):
+        name = ''.join(rng.choice(letters) for _ in range(6)) + letters[idx % 26]
+        names.append(name)
+        first, last = sorted(rng.sample(letters, 2))
+        lines.append(f"let {name} = ['{first}'-'{last}']+")
+    lines += ['', 'rule tokens =']
+    for idx, name in enumerate(names):
+        separator = ' ' if idx == 0 else '|'
+        lines.append(f'  {separator} {name}       {{ return TOKEN }}')
+    return '\n'.join(lines) + '\n'
+
+
+def syntheticPatterns(rng: random.Random) -> dict:
+    '''
+    This function returns regular expressions, in the notation of the patterns, that stress the automata construction.
+    '''
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    words = [''.join(rng.choice(letters) for _ in range(rng.randint(3, 9)))
+             for _ in range(64)]
+    return {
+        # The n-th symbol from the end is an a, its DFA has 2^n states
+        'nth-from-end-8': '(a|b)*a' + '(a|b)' * 7,
+        'keywords-64': '(' + '|'.join(words) + ')',
+        'classes-16': "['a'-'z']+" + "(_['a'-'z''0'-'9']+)?" * 16,
+    }
+
+
+def modulePatterns() -> dict:
+    '''
+    This function returns the patterns the lexer of the .yal files uses.
+    '''
+    return {pattern.name: pattern.pattern for pattern in [COMMENT, WS, ID, EQ, EXPR, RETURN, OPERATOR, GROUP, CHAR, STR]}
+
+
+'''
+↓↓ STAGES ↓↓
+'''
+
+
+def postfix(pattern: str) -> list:
+    '''
+    This function returns the pattern in postfix notation.
+    '''
+    expr = Expression(pattern)
+    expr.hardProcess()
+    return expr.infixRegEx
+
+
+def tokenizer(source: str) -> Tokenizer:
+    '''
+    This function returns the lexer of the .yal files over the source, with its patterns ready.
+    '''
+    lexer = Tokenizer(source)
+    lexer.addPatterns(SKIPPED_PATTERNS, skip=True)
+    lexer.addPatterns(LEXER_PATTERNS)
+    lexer.getMultiDFA()
+    return lexer
+
+
+def letSequencer(lexer: Tokenizer) -> YalSeq:
+    '''
+    This function returns the sequencer of the let definitions, as app.py builds it.
+    '''
+    return YalSeq(
+        lexer,
+        [
+            [LET, MATCH],
+            [WS, EXIST],
+            [ID, IDENT],
+            [WS, EXIST],
+            [EQ, EXIST],
+            [WS, EXIST],
+            [EXPR, VALUE],
+        ],
+        [ID, OPERATOR, GROUP, CHAR],
+        ID
+    )
+
+
+def benchmarks(seed: int, size: int) -> list[Benchmark]:
+    '''
+    This function returns every benchmark, the workloads are generated from the seed so runs are repeatable.
+    Parameters:
+    - seed: The seed of the synthetic workloads.
+    - size: The scale of the synthetic workloads.
+    '''
+    rng = random.Random(seed)
+    patterns = {**modulePatterns(), **syntheticPatterns(rng)}
+    sources = yalFiles()
+    sources[f'synthetic-{size}.yal'] = syntheticYal(rng, size)
+    words = [bytes(rng.choice(b'abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(1, 16)))
+             for _ in range(size * 10)]
+    binaryWords = [bytes(rng.choice(b'ab') for _ in range(rng.randint(8, 32)))
+                   for _ in range(size * 10)]
+
+    result = []
+
+    for name, pattern in patterns.items():
+        def expression(pattern=pattern):
+            def run():
+                expr = Expression(pattern)
+                expr.hardProcess()
+            return run
+
+        def ast(pattern=pattern):
+            infix = postfix(pattern)
+            return lambda: AST(infix)
+
+        def flatAst(pattern=pattern):
+            infix = postfix(pattern)
+            return lambda: FlatAST(infix)
+
+        def dirDfa(pattern=pattern):
+            flat = FlatAST(postfix(pattern))
+            return lambda: DirDFA(flat)
+
+        def minDfa(pattern=pattern):
+            dfa = DirDFA(FlatAST(postfix(pattern)))
+            return lambda: MinDFA(dfa, dfa.alphabet)
+
+        result += [
+            Benchmark('expression.hardProcess', name, expression),
+            Benchmark('ast.AbstractSyntaxTree', name, ast),
+            Benchmark('ast.FlatAbstractSyntaxTree', name, flatAst),
+            Benchmark('dir_dfa.DirDFA', name, dirDfa),
+            Benchmark('min_dfa.MinDFA', name, minDfa),
+        ]
+
+    for name, pattern, inputs in [('ID', ID.pattern, words), ('nth-from-end-8', patterns['nth-from-end-8'], binaryWords)]:
+        def simulate(name=name, pattern=pattern, inputs=inputs):
+            automaton = Pattern(name, pattern).min_dir_dfa
+            automaton.freeze()
+
+            def run():
+                for input in inputs:
+                    automaton.simulate(input)
+            return run
+        result.append(Benchmark('automaton.simulate', name, simulate))
+
+    for name, source in sources.items():
+        def tokenize(source=source):
+            # The automaton is built out of the timing, only the scan is timed
+            lexer = tokenizer(source)
+
+            def run():
+                lexer.resetSource(lexer.codified, lexer.unCodified)
+                lexer.tokenize()
+            return run
+
+        def extractIdent(source=source):
+            # The sequencer and its sub-lexers are built out of the timing, only the extraction is timed
+            lexer = tokenizer(source)
+            lexer.tokenize()
+            sequencer = letSequencer(lexer)
+
+            def run():
+                # The symbols of the lexer are only read, the results of the previous run are cleared
+                sequencer.reset()
+                sequencer.extractIdent()
+            return run
+
+        result += [
+            Benchmark('tokenizer.tokenize', name, tokenize),
+            Benchmark('yal_seq.extractIdent', name, extractIdent),
+        ]
+
+    return result
+
+
+'''
+↓↓ RESULTS ↓↓
+'''
+
+
+def compare(results: list[dict], baseline: dict, threshold: float) -> list[str]:
+    '''
+    This function prints the change of the median of every benchmark against the baseline.
+    Parameters:
+    - results: The results of this run.
+    - baseline: The results of a previous run, as written by --output.
+    - threshold: The relative slowdown from which a benchmark is a regression.
+    Returns:
+    - The names of the benchmarks that regressed.
+    '''
+    previous = {result['name']: result for result in baseline['results']}
+    regressions = []
+    print(f'{"benchmark":<60} {"baseline":>12} {"current":>12} {"change":>8}')
+    for result in results:
+        before = previous.get(result['name'])
+        if before is None:
+            print(f'{result["name"]:<60} {"-":>12} {result["median"]:>12.6f} {"new":>8}')
+            continue
+        change = result['median'] / before['median'] - 1 if before['median'] else 0.0
+        flag = ''
+        if change > threshold:
+            regressions.append(result['name'])
+            flag = ' ✖'
+        print(f'{result["name"]:<60} {before["median"]:>12.6f} {result["median"]:>12.6f} {change:>+8.1%}{flag}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Micro-benchmarks of every stage of the pipeline.')
+    parser.add_argument('--output', type=str, default=None,
+                        help='Write the results as JSON to this file.')
+    parser.add_argument('--baseline', type=str, default=None,
+                        help='Compare the results against the JSON of a previous run.')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Relative slowdown of the median from which a benchmark is a regression.')
+    parser.add_argument('--fail-on-regression', action='store_true',
+                        help='Exit with status 1 if some benchmark regressed.')
+    parser.add_argument('--filter', type=str, default='',
+                        help='Only run the benchmarks whose name contains this text.')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Amount of timings of each benchmark.')
+    parser.add_argument('--number', type=int, default=3,
+                        help='Amount of calls of each timing.')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Seed of the synthetic workloads.')
+    parser.add_argument('--size', type=int, default=200,
+                        help='Scale of the synthetic workloads.')
+    args = parser.parse_args()
+
+    # The automata must be built by the benchmarks, not loaded from the on-disk cache
+    os.environ[CACHE_DIR_ENV] = ''
+
+    results = []
+    for benchmark in benchmarks(args.seed, args.size):
+        if args.filter not in benchmark.name:
+            continue
+        result = benchmark.run(args.repeat, args.number)
+        results.append(result)
+        print(f'{result["name"]:<60} {result["median"]:>12.6f} s')
+
+    report = {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'seed': args.seed,
+        'size': args.size,
+        'results': results,
+    }
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f'✔ Results written to {args.output}')
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f'✖ {len(regressions)} benchmarks regressed more than {args.threshold:.0%}')
+            if args.fail_on_regression:
+                sys.exit(1)
+        else:
+            print('✔ No regressions')
+
+
+if __name__ == '__main__':
+    main()
@@ -7,7 +7,8 @@
 """
 
 
-from src.utils.constants import KLEENE_STAR, OR, CONCAT, ZERO_OR_ONE, ONE_OR_MORE, EPSILON
+from src.utils.constants import KLEENE_STAR, OR, CONCAT, ZERO_OR_ONE, ONE_OR_MORE, EPSILON, TERMINATOR
+from src.utils.constants import SYMBOL_NODE, EPSILON_NODE, OR_NODE, CONCAT_NODE, KLEENE_STAR_NODE, ONE_OR_MORE_NODE, ZERO_OR_ONE_NODE, TERMINATOR_NODE
 from src.utils.structures.tree_node import TreeNode
 from src.utils.tools import errorsManager
 from graphviz import Digraph
@@ -16,6 +17,7 @@ from graphviz import Digraph
 class AbstractSyntaxTree(object):
     '''
     This class represents the abstract syntax tree of a regular expression.
+    Operands used more than once, and the definitions of references, are shared by their parents instead of copied, so the tree is drawn as it is written.
     '''
 
     def __init__(self, postfixRegEx: list):
@@ -74,7 +76,12 @@ class AbstractSyntaxTree(object):
                     return None
                 peaked = stack.pop()
                 stack.append(TreeNode(CONCAT, TreeNode(
-                    KLEENE_STAR, peaked), peaked.deepCopy()))
+                    KLEENE_STAR, peaked), peaked))
+            elif not isinstance(c, str):
+                # A reference to the definition of an identifier, its tree is shared by every use
+                definition = c.getAbstractSyntaxTree()
+                stack.append(definition.root)
+                self.alphabet.update(definition.alphabet)
             else:
                 stack.append(TreeNode(c))
                 if c != EPSILON:
@@ -97,11 +104,7 @@ class AbstractSyntaxTree(object):
 
         dot.attr(label=label)
 
-        def add_nodes_edges(tree_node, parent_id=None):
-            # Base case: if the tree node is None, return
-            if tree_node is None:
-                return
-
+        def add_node(tree_node):
             # Create a unique id for the current node
             node_id = id(tree_node)
 
@@ -118,15 +121,224 @@ class AbstractSyntaxTree(object):
 
             dot.node(str(node_id), label=label)
 
+        # Walk from the root with an explicit stack, visiting the left child before the right one
+        # A shared subtree is drawn once, with an edge from each of its parents
+        drawn = set()
+        stack = [(self.root, None)]
+        while stack:
+            tree_node, parent_id = stack.pop()
+            if tree_node is None:
+                continue
             # If this is not the root node, add an edge from the parent node to the current node
             if parent_id is not None:
-                dot.edge(str(parent_id), str(node_id))
+                dot.edge(str(parent_id), str(id(tree_node)))
+            if id(tree_node) in drawn:
+                continue
+            drawn.add(id(tree_node))
+            add_node(tree_node)
+            stack.append((tree_node.right, id(tree_node)))
+            stack.append((tree_node.left, id(tree_node)))
 
-            # Recurse on the left and right children
-            add_nodes_edges(tree_node.left, node_id)
-            add_nodes_edges(tree_node.right, node_id)
+        dot.render(f'output/{id_}/{name}', format='png', cleanup=True)
 
-        # Start the recursion from the root
-        add_nodes_edges(self.root)
 
-        dot.render(f'output/{id_}/{name}', format='png', cleanup=True)
+class FlatAbstractSyntaxTree(object):
+    '''
+    This class represents the abstract syntax tree of a regular expression as a struct of arrays: an op code, the indices of the children and the set of symbols of every node.
+    Nodes are stored in post order, every child comes before its parent, so the passes over the tree are plain loops over the indices.
+    '''
+
+    def __init__(self, postfixRegEx: list = None):
+        '''
+        This is the constructor of the class.
+        Parameters:
+        - postfixRegEx: A regular expression in postfix notation.
+        '''
+        self.errorsManager = errorsManager()
+        self.alphabet: set[str] = set()
+        self.ops: list[int] = []
+        self.left: list[int] = []
+        self.right: list[int] = []
+        self.symbols: list[frozenset] = []
+        self.root: int = -1
+        if postfixRegEx is not None:
+            self.root = self.PE2FA(postfixRegEx)
+        self.alphabet = sorted(list(self.alphabet))
+
+    def __len__(self) -> int:
+        return len(self.ops)
+
+    def addNode(self, op: int, left: int = -1, right: int = -1, symbols: frozenset = None) -> int:
+        '''
+        This function appends a node and returns its index. Unary operators keep their operand on left.
+        '''
+        self.ops.append(op)
+        self.left.append(left)
+        self.right.append(right)
+        self.symbols.append(symbols)
+        return len(self.ops) - 1
+
+    def addOr(self, left: int, right: int) -> int:
+        '''
+        This function appends an alternation. An alternation between two sets of symbols is collapsed into a single set, as they are the last two nodes this only replaces them.
+        '''
+        last = len(self.ops) - 1
+        if (left, right) == (last - 1, last) and self.ops[left] == SYMBOL_NODE and self.ops[right] == SYMBOL_NODE:
+            symbols = self.symbols[left] | self.symbols[right]
+            for array in [self.ops, self.left, self.right, self.symbols]:
+                del array[-2:]
+            return self.addNode(SYMBOL_NODE, symbols=symbols)
+        return self.addNode(OR_NODE, left, right)
+
+    def addTree(self, template: 'FlatAbstractSyntaxTree') -> int:
+        '''
+        This function appends a copy of the nodes of another tree, and returns the index of its root.
+        '''
+        offset = len(self.ops)
+        self.ops.extend(template.ops)
+        self.left.extend(
+            child + offset if child >= 0 else child for child in template.left)
+        self.right.extend(
+            child + offset if child >= 0 else child for child in template.right)
+        self.symbols.extend(template.symbols)
+        self.alphabet.update(template.alphabet)
+        return template.root + offset
+
+    def copy(self) -> 'FlatAbstractSyntaxTree':
+        '''
+        This function returns a copy of the tree, only the arrays are copied.
+        '''
+        tree = FlatAbstractSyntaxTree()
+        tree.alphabet = self.alphabet
+        tree.ops = self.ops[:]
+        tree.left = self.left[:]
+        tree.right = self.right[:]
+        tree.symbols = self.symbols[:]
+        tree.root = self.root
+        return tree
+
+    @staticmethod
+    def fromTreeNode(root: TreeNode) -> 'FlatAbstractSyntaxTree':
+        '''
+        This function flattens a binary tree of TreeNode. A subtree shared by several parents is flattened once for each of them, so every position is distinct.
+        '''
+        tree = FlatAbstractSyntaxTree()
+        alphabet = set()
+
+        def flatten(node: TreeNode, left: int, right: int) -> int:
+            children = [child for child in [left, right] if child is not None]
+            if node.value == OR:
+                return tree.addOr(*children)
+            elif node.value == CONCAT:
+                return tree.addNode(CONCAT_NODE, *children)
+            elif node.value == KLEENE_STAR:
+                return tree.addNode(KLEENE_STAR_NODE, children[0])
+            elif node.value == EPSILON:
+                return tree.addNode(EPSILON_NODE)
+            elif node.value == TERMINATOR:
+                return tree.addNode(TERMINATOR_NODE)
+            symbols = node.value if isinstance(
+                node.value, frozenset) else frozenset([node.value])
+            alphabet.update(symbols)
+            return tree.addNode(SYMBOL_NODE, symbols=symbols)
+
+        tree.root = root.fold(flatten)
+        tree.alphabet = sorted(list(alphabet))
+        return tree
+
+    '''
+    ↓↓ ALGORITHMS ↓↓
+    '''
+
+    def PE2FA(self, postfixRegEx: list) -> int:
+        '''
+        Postfix Expression to Flat Abstract Syntax Tree. Unlike PE2AS, one or more and zero or one are kept as operators, so no operand is ever copied.
+        Parameters:
+        - postfixRegEx: A regular expression in postfix notation.
+        Returns:
+        - The index of the root of the tree.
+        '''
+        stack: list[int] = []
+        unary = {KLEENE_STAR: (KLEENE_STAR_NODE, 'the Kleene star'), ONE_OR_MORE: (
+            ONE_OR_MORE_NODE, 'the one or more'), ZERO_OR_ONE: (ZERO_OR_ONE_NODE, 'the zero or one')}
+
+        for c in postfixRegEx:
+            if c in unary:
+                op, name = unary[c]
+                if not stack:
+                    self.errorsManager.addError(
+                        f'There is no character to apply {name} to', 'Invalid regular expression'
+                    )
+                    return -1
+                stack.append(self.addNode(op, stack.pop()))
+            elif c in [OR, CONCAT]:
+                if len(stack) < 2:
+                    self.errorsManager.addError(
+                        f'There are not enough characters to apply {c} to', 'Invalid regular expression'
+                    )
+                    return stack.pop() if stack else -1
+                right = stack.pop()
+                left = stack.pop()
+                if c == OR:
+                    stack.append(self.addOr(left, right))
+                else:
+                    stack.append(self.addNode(CONCAT_NODE, left, right))
+            elif c == EPSILON:
+                stack.append(self.addNode(EPSILON_NODE))
+            elif not isinstance(c, str):
+                # A reference to the definition of an identifier, its tree is instantiated as a template
+                template = c.getTree()
+                if template.errorsManager.haveErrors():
+                    self.errorsManager.addError(
+                        f'The definition of \"{c}\" is not valid', 'Invalid regular expression'
+                    )
+                    return -1
+                stack.append(self.addTree(template))
+            else:
+                stack.append(self.addNode(
+                    SYMBOL_NODE, symbols=frozenset([c])))
+                self.alphabet.add(c)
+
+        return stack.pop() if stack else -1
+
+    def validate(self, postfixRegEx: list) -> bool:
+        '''
+        This function checks that every operator of a postfix expression has its operands, as PE2FA does, without building the tree.
+        A reference counts as a single operand, its definition is validated once and the result is kept on the reference, so nothing is instantiated.
+        Parameters:
+        - postfixRegEx: A regular expression in postfix notation.
+        Returns:
+        - True if the expression is valid, the errors are added to the errors manager otherwise.
+        '''
+        unary = {KLEENE_STAR: 'the Kleene star',
+                 ONE_OR_MORE: 'the one or more', ZERO_OR_ONE: 'the zero or one'}
+        operands = 0
+
+        for c in postfixRegEx:
+            if c in unary:
+                if not operands:
+                    self.errorsManager.addError(
+                        f'There is no character to apply {unary[c]} to', 'Invalid regular expression'
+                    )
+                    return False
+            elif c in [OR, CONCAT]:
+                if operands < 2:
+                    self.errorsManager.addError(
+                        f'There are not enough characters to apply {c} to', 'Invalid regular expression'
+                    )
+                    return False
+                operands -= 1
+            elif not isinstance(c, str):
+                if not c.isValid():
+                    self.errorsManager.addError(
+                        f'The definition of \"{c}\" is not valid', 'Invalid regular expression'
+                    )
+                    return False
+                operands += 1
+            else:
+                operands += 1
+
+        return True
+    '''
+    ↑↑ END ALGORITHMS ↑↑
+    '''
@@ -0,0 +1,156 @@
+from ._dir_dfa import DirectDeterministicFiniteAutomaton as DirDFA
+from ._ast import FlatAbstractSyntaxTree
+from .utils.structures.tree_node import TreeNode
+from .utils.constants import TERMINATOR, BIT_PARALLEL_BLOCK, WS_CODE, SINGLE_QUOTE_CODE, UNQUOTED_WS_CODE
+from .utils.instrumentation import instrumentation
+
+
+class BitParallelAutomaton(DirDFA):
+    '''
+    This class represents the Glushkov automaton of a regular expression, simulated bit-parallel (Shift-And).
+    The active states are the bitmask of the positions just read. A step follows every active position at once and keeps the positions that hold the symbol read:
+        D' = follow(D) & B[class]
+    follow(D) is looked up by blocks of BIT_PARALLEL_BLOCK bits, so no DFA is built nor minimized.
+    '''
+
+    instrumentationName: str = 'bit_parallel'
+
+    def __init__(self, abstractSyntaxTree: FlatAbstractSyntaxTree | TreeNode) -> None:
+        '''
+        This is the constructor of the class.
+        Parameters:
+        - ast: The abstract syntax tree of a regular expression, flat or as the root TreeNode.
+        '''
+        # The positions that hold each class
+        self.classPositions: list[int] = []
+        # For each block of bits, the union of the followpos of the positions of every value of the block
+        self.followBlocks: list[list[int]] = []
+        # The positions after which the input can end
+        self.acceptanceMask: int = 0
+        self.initialMask: int = 0
+        self.initialAcceptance: bool = False
+
+        super().__init__(abstractSyntaxTree)
+
+    def countBuild(self):
+        '''
+        This method is made for add the amount of positions of the automaton built to the counters, it has no states of its own.
+        '''
+        instrumentation.count('bit_parallel.positions', self.counter)
+
+    def build(self):
+        '''
+        This method is made for build the automaton.
+
+        Specific: Compute the masks of each class, the positions that accept and the follow tables by block.
+        '''
+        terminatorMask = 0
+        self.classPositions = [0] * len(self.alphabet)
+        for position, symbols in self.symbols.items():
+            if symbols == TERMINATOR:
+                terminatorMask |= 1 << position
+                continue
+            for symbol in symbols:
+                self.classPositions[symbol] |= 1 << position
+
+        for position, follow in enumerate(self.followPositions):
+            if follow & terminatorMask:
+                self.acceptanceMask |= 1 << position
+
+        root = self.abstractSyntaxTree.root
+        self.initialMask = self.firstPos[root] & ~terminatorMask
+        self.initialAcceptance = bool(self.firstPos[root] & terminatorMask)
+
+        size = 1 << BIT_PARALLEL_BLOCK
+        for first in range(0, len(self.followPositions), BIT_PARALLEL_BLOCK):
+            table = [0] * size
+            for value in range(1, size):
+                lowest = value & -value
+                position = first + lowest.bit_length() - 1
+                follow = self.followPositions[position] if position < len(self.followPositions) else 0
+                table[value] = table[value ^ lowest] | follow
+            self.followBlocks.append(table)
+
+    def postprocessing(self):
+        '''
+        This method is made for postprocessing the automaton. There are no states to rename.
+        '''
+        pass
+
+    def freeze(self):
+        '''
+        This method is made for map the integer symbols of the codified input to their classes.
+        '''
+        self.byteClasses = self.byteClassesOf(self.classOf)
+
+    '''
+    ↓↓ ALGORITHMS ↓↓
+    '''
+
+    def follow(self, active: int) -> int:
+        '''
+        This function returns the union of followpos(p) for every active position p.
+        '''
+        follow = 0
+        for table in self.followBlocks:
+            if not active:
+                break
+            follow |= table[active & ((1 << BIT_PARALLEL_BLOCK) - 1)]
+            active >>= BIT_PARALLEL_BLOCK
+        return follow
+
+    def simulate(self, input: bytes, start: int = 0, end: int = None):
+        '''
+        This method is made for simulate the automaton, as Automaton.simulate.
+        Returns:
+        - If the automaton accepts, and the amount of characters consumed from start.
+        '''
+        end = len(input) if end is None else end
+        _, length, stop = self.walk(input, start, end)
+        if stop < end:
+            return False, stop - start
+        if end == start:
+            return self.initialAcceptance, 0
+        return length == end - start, end - start
+
+    def walk(self, input: bytes, start: int = 0, end: int = None) -> tuple:
+        '''
+        This method is made for walk the input from the start offset looking for the longest accepted prefix, as Automaton.walk.
+        Returns:
+        - None (the automaton is not labeled), the length of the longest accepted prefix, and the index where the walk stopped.
+        '''
+        byteClasses = self.byteClasses
+        classPositions = self.classPositions
+        acceptanceMask = self.acceptanceMask
+        # A single block is looked up directly
+        singleBlock = self.followBlocks[0] if len(self.followBlocks) == 1 else None
+        size = len(input)
+        end = size if end is None else end
+        follow = self.initialMask
+        length = 0
+        stop = end
+        for idx in range(start, end):
+            symbol = input[idx]
+            if symbol == WS_CODE:
+                if not (0 < idx < size - 1 and input[idx - 1] == SINGLE_QUOTE_CODE and input[idx + 1] == SINGLE_QUOTE_CODE):
+                    symbol = UNQUOTED_WS_CODE
+            elif symbol >= UNQUOTED_WS_CODE:
+                stop = idx
+                break
+            column = byteClasses[symbol]
+            if column < 0:
+                stop = idx
+                break
+            active = follow & classPositions[column]
+            if not active:
+                stop = idx
+                break
+            if active & acceptanceMask:
+                length = idx + 1 - start
+            follow = singleBlock[active] if singleBlock is not None else self.follow(active)
+        if instrumentation.enabled:
+            instrumentation.count('automaton.steps', stop - start)
+        return None, length, stop
+    '''
+    ↑↑ END ALGORITHMS ↑↑
+    '''
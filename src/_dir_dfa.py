@@ -1,11 +1,14 @@
 from .models._automaton import Automaton
+from .utils.instrumentation import instrumentation
 from .utils.structures.tree_node import TreeNode
 from .utils.structures.state import State
 from .utils.structures.transition import Transition
-from .utils.constants import EPSILON, OR, CONCAT, KLEENE_STAR, TERMINATOR
-from collections import defaultdict
+from .utils.constants import TERMINATOR
+from .utils.constants import SYMBOL_NODE, EPSILON_NODE, OR_NODE, CONCAT_NODE, KLEENE_STAR_NODE, ONE_OR_MORE_NODE, ZERO_OR_ONE_NODE, TERMINATOR_NODE
+from ._ast import FlatAbstractSyntaxTree
+from collections import defaultdict, deque
 
-from .utils.tools import numberToLetter
+from .utils.tools import numberToLetter, bitPositions
 
 
 class DirectDeterministicFiniteAutomaton(Automaton):
@@ -13,34 +16,73 @@ class DirectDeterministicFiniteAutomaton(Automaton):
     This class represents a direct deterministic finite automaton.
     '''
 
-    def __init__(self, abstractSyntaxTree: TreeNode) -> None:
+    # Prefix of the span and counters of the construction, the engines built on this class report under their own
+    instrumentationName: str = 'dir_dfa'
+
+    def __init__(self, abstractSyntaxTree: FlatAbstractSyntaxTree | TreeNode) -> None:
         '''
         This is the constructor of the class.
         Parameters:
-        - ast: The abstract syntax tree of a regular expression.
+        - ast: The abstract syntax tree of a regular expression, flat or as the root TreeNode.
         '''
         super().__init__()
 
-        self.abstractSyntaxTree: TreeNode = abstractSyntaxTree
+        if isinstance(abstractSyntaxTree, TreeNode):
+            abstractSyntaxTree = FlatAbstractSyntaxTree.fromTreeNode(
+                abstractSyntaxTree)
+
+        self.abstractSyntaxTree: FlatAbstractSyntaxTree = abstractSyntaxTree.copy()
         self.symbols: dict = dict()
-        self.followPosDict: dict = dict()
+        # Position sets are bitmasks, bit i set means position i is in the set
+        self.followPositions: list[int] = []
         self.counter: int = 0
+        self.alphabet: list[int] = []
+        self.classOf: dict = dict()
 
-        self.preprocess()
-        self.process()
-        self.build()
-        self.postprocessing()
+        # Per node of the tree
+        self.positions: list[int] = []
+        self.nullables: list[bool] = []
+        self.firstPos: list[int] = []
+        self.lastPos: list[int] = []
+
+        with instrumentation.span(f'{self.instrumentationName}.build'):
+            self.preprocess()
+            self.process()
+            self.build()
+            self.postprocessing()
+            self.freeze()
+        self.countBuild()
+
+    def countBuild(self):
+        '''
+        This method is made for add the size of the automaton built to the counters.
+        '''
+        instrumentation.count('dir_dfa.states', len(self.states))
+        instrumentation.count('dir_dfa.transitions', len(self.transitions))
 
     def preprocess(self):
         '''
         This method is made for preprocess the automaton.
 
-        Specific: Transform the Abstract Syntax Tree nodes to a custom class that has all the information we need.
+        Specific: Append the terminator to the tree, split the alphabet into equivalence classes, and number the positions of the tree.
         '''
-        newRoot = TreeNode(CONCAT, TreeNode(TERMINATOR),
-                           self.abstractSyntaxTree)
-        self.abstractSyntaxTree = newRoot
-        self.abstractSyntaxTree.postOrderTraversal(self.toCustomNode)
+        tree = self.abstractSyntaxTree
+        terminator = tree.addNode(TERMINATOR_NODE)
+        tree.root = tree.addNode(CONCAT_NODE, tree.root, terminator)
+
+        self.classify()
+
+        self.positions = [0] * len(tree)
+        for node, op in enumerate(tree.ops):
+            if op == SYMBOL_NODE:
+                self.counter += 1
+                self.positions[node] = self.counter
+                self.symbols[self.counter] = sorted(
+                    set(self.classOf[symbol] for symbol in tree.symbols[node]))
+            elif op == TERMINATOR_NODE:
+                self.counter += 1
+                self.positions[node] = self.counter
+                self.symbols[self.counter] = TERMINATOR
 
     def process(self):
         '''
@@ -48,9 +90,9 @@ class DirectDeterministicFiniteAutomaton(Automaton):
 
         Specific: Get the nullable, firstPos, lastPos and followPos of the nodes of the Abstract Syntax Tree.
         '''
-        self.abstractSyntaxTree.postOrderTraversal(self.nullable)
-        self.abstractSyntaxTree.postOrderTraversal(self.firstAndLastPos)
-        self.abstractSyntaxTree.postOrderTraversal(self.followPos)
+        self.nullable()
+        self.firstAndLastPos()
+        self.followPos()
 
     def build(self):
         '''
@@ -60,33 +102,40 @@ class DirectDeterministicFiniteAutomaton(Automaton):
         @Reference: Figure 3.62: Construction of a DFA directly from a regular expression. Aho - Compilers: Principles, Techniques, and Tools (2nd Edition)
         '''
         initialState = State(
-            self.abstractSyntaxTree.value.firstPos, id=0, initial=True)
+            self.firstPos[self.abstractSyntaxTree.root], id=0, initial=True)
         self.initialState = initialState
         self.states.append(initialState)
         self.counter = 1
 
-        while any(not state.marked for state in self.states):
-            S = next(state for state in self.states if not state.marked)
+        # Unmarked states wait on a queue, and states are found by their bitmask of positions.
+        statesByPositions = {initialState.value: initialState}
+        unmarked = deque([initialState])
+
+        while unmarked:
+            S = unmarked.popleft()
             S.marked = True
 
-            symbols = defaultdict(list)
-            for id in S.value:
-                symbol = self.symbols[id]
-                symbols[symbol].append(id)
-
-            for symbol in symbols:
-                if symbol != TERMINATOR:
-                    U = set()
-                    for id in symbols[symbol]:
-                        U = U.union(self.followPosDict.get(id, set()))
-                    if not any(state.value == U for state in self.states):
-                        self.states.append(State(U, self.counter))
-                        self.counter += 1
-                    U = next(state for state in self.states if state.value == U)
-                    self.transitions.append(Transition(S.id, U.id, symbol))
-                else:
+            # U of each symbol is the union of followpos(p) for every position p of S that holds the symbol
+            symbols = defaultdict(int)
+            for id in bitPositions(S.value):
+                if self.symbols[id] == TERMINATOR:
                     S.acceptance = True
-                    self.acceptanceStates.append(S)
+                    continue
+                for symbol in self.symbols[id]:
+                    symbols[symbol] |= self.followPositions[id]
+
+            if S.acceptance:
+                self.acceptanceStates.append(S)
+
+            for symbol in sorted(symbols):
+                U = symbols[symbol]
+                if U not in statesByPositions:
+                    statesByPositions[U] = State(U, self.counter)
+                    self.states.append(statesByPositions[U])
+                    unmarked.append(statesByPositions[U])
+                    self.counter += 1
+                self.transitions.append(Transition(
+                    S.id, statesByPositions[U].id, symbol))
 
     def postprocessing(self):
         '''
@@ -95,119 +144,95 @@ class DirectDeterministicFiniteAutomaton(Automaton):
         for state in self.states:
             state.value = numberToLetter(state.id+1).upper()
 
-    '''
-    ↓↓ INNER CLASSES ↓↓
-    '''
-    class CustomNode(object):
-        '''
-        This class represents a custom node for the direct deterministic finite automaton.
-        '''
-
-        def __init__(self, value: str, id: int, firstPos: set = set(), lastPos: set = set(), nullable: bool = None) -> None:
-            '''
-            This is the constructor of the class.
-            Parameters:
-            - value: The value of the node.
-            - firstPos: The first position set of the node.
-            - lastPos: The last position set of the node.
-            - nullable: The nullable property of the node.
-            '''
-            self.value: str = value
-            self.id: int = id
-            self.firstPos: set = firstPos
-            self.lastPos: set = lastPos
-            self.nullable: bool = nullable
-    '''
-    ↑↑ END INNER CLASSES ↑↑
-    '''
-
-    '''
-    ↓↓ ASSOCIATED FUNCTIONS ↓↓
-    '''
-
-    def toCustomNode(self,  node: TreeNode):
-        '''
-        This function is made for transform a TreeNode to a CustomNode.
-        '''
-
-        if node.value not in [EPSILON, OR, CONCAT, KLEENE_STAR]:
-            self.counter += 1
-            self.symbols[self.counter] = node.value
-            node.value = self.CustomNode(node.value, self.counter)
-        else:
-            node.value = self.CustomNode(node.value, None)
-    '''
-    ↑↑ END ASSOCIATED FUNCTIONS ↑↑
-    '''
-
     '''
     ↓↓ ALGORITHMS ↓↓
     '''
 
-    def nullable(self, node: TreeNode):
-        '''
-        This function modifies the nullable attribute of the node.
-        '''
-        if node.value.value == EPSILON:
-            node.value.nullable = True
-        elif node.value.value == OR:
-            node.value.nullable = node.left.value.nullable or node.right.value.nullable
-        elif node.value.value == CONCAT:
-            node.value.nullable = node.left.value.nullable and node.right.value.nullable
-        elif node.value.value == KLEENE_STAR:
-            node.value.nullable = True
-        else:
-            node.value.nullable = False
-
-    def firstAndLastPos(self, node: TreeNode) -> set:
-        '''
-        This function modifies the firstPos and lastPos attributes of the node.
-        '''
-        if node.value.value == EPSILON:
-            node.value.firstPos = set()
-            node.value.lastPos = set()
-        elif node.value.value == OR:
-            node.value.firstPos = node.left.value.firstPos.union(
-                node.right.value.firstPos)
-            node.value.lastPos = node.left.value.lastPos.union(
-                node.right.value.lastPos)
-        elif node.value.value == CONCAT:
-            if node.left.value.nullable:
-                node.value.firstPos = node.left.value.firstPos.union(
-                    node.right.value.firstPos)
-            else:
-                node.value.firstPos = node.left.value.firstPos
-            if node.right.value.nullable:
-                node.value.lastPos = node.left.value.lastPos.union(
-                    node.right.value.lastPos)
-            else:
-                node.value.lastPos = node.right.value.lastPos
-        elif node.value.value == KLEENE_STAR:
-            if node.right:
-                node.value.firstPos = node.right.value.firstPos
-                node.value.lastPos = node.right.value.lastPos
-            else:
-                node.value.firstPos = node.left.value.firstPos
-                node.value.lastPos = node.left.value.lastPos
-        else:
-            node.value.firstPos = {node.value.id}
-            node.value.lastPos = {node.value.id}
-
-    def followPos(self, node: TreeNode):
-        '''
-        This function modifies the followPos attribute of the node.
-        '''
-
-        # If n is a cat-node with left child  c1 and right child c2, then every position i in lastpost(c1), all positions in firstpos(c2) are in followpos(i).
-        if node.value.value == CONCAT:
-            for i in node.left.value.lastPos:
-                self.followPosDict[i] = self.followPosDict.get(i, set()).union(
-                    node.right.value.firstPos)
-        # if n is a star-node, and i is a position in lastpos(n), then all positions in firstpos(n) ar in followpos(i).
-        elif node.value.value == KLEENE_STAR:
-            for i in node.value.lastPos:
-                self.followPosDict[i] = self.followPosDict.get(i, set()).union(
-                    node.value.firstPos)
+    def classify(self):
+        '''
+        This function splits the alphabet into equivalence classes, two symbols share a class when no leaf of the tree distinguishes them.
+        The automaton is built over the class ids, and classOf maps every symbol to its class.
+        '''
+        tree = self.abstractSyntaxTree
+        leaves = set(symbols for op, symbols in zip(
+            tree.ops, tree.symbols) if op == SYMBOL_NODE)
+
+        classes = [frozenset().union(*leaves)] if leaves else []
+        for leaf in leaves:
+            refined = []
+            for symbolClass in classes:
+                inside = symbolClass & leaf
+                outside = symbolClass - leaf
+                refined.extend(part for part in [inside, outside] if part)
+            classes = refined
+
+        classes.sort(key=lambda symbolClass: min(symbolClass))
+        self.alphabet = list(range(len(classes)))
+        self.classOf = {symbol: idx for idx, symbolClass in enumerate(classes)
+                        for symbol in symbolClass}
+
+    def nullable(self):
+        '''
+        This function computes the nullable property of every node, children come before their parents.
+        '''
+        tree = self.abstractSyntaxTree
+        self.nullables = [False] * len(tree)
+        for node, op in enumerate(tree.ops):
+            if op in [EPSILON_NODE, KLEENE_STAR_NODE, ZERO_OR_ONE_NODE]:
+                self.nullables[node] = True
+            elif op == OR_NODE:
+                self.nullables[node] = self.nullables[tree.left[node]
+                                                      ] or self.nullables[tree.right[node]]
+            elif op == CONCAT_NODE:
+                self.nullables[node] = self.nullables[tree.left[node]
+                                                      ] and self.nullables[tree.right[node]]
+            elif op == ONE_OR_MORE_NODE:
+                self.nullables[node] = self.nullables[tree.left[node]]
+
+    def firstAndLastPos(self):
+        '''
+        This function computes the firstPos and lastPos of every node.
+        '''
+        tree = self.abstractSyntaxTree
+        self.firstPos = [0] * len(tree)
+        self.lastPos = [0] * len(tree)
+        for node, op in enumerate(tree.ops):
+            left = tree.left[node]
+            right = tree.right[node]
+            if op in [SYMBOL_NODE, TERMINATOR_NODE]:
+                self.firstPos[node] = 1 << self.positions[node]
+                self.lastPos[node] = self.firstPos[node]
+            elif op == OR_NODE:
+                self.firstPos[node] = self.firstPos[left] | self.firstPos[right]
+                self.lastPos[node] = self.lastPos[left] | self.lastPos[right]
+            elif op == CONCAT_NODE:
+                if self.nullables[left]:
+                    self.firstPos[node] = self.firstPos[left] | self.firstPos[right]
+                else:
+                    self.firstPos[node] = self.firstPos[left]
+                if self.nullables[right]:
+                    self.lastPos[node] = self.lastPos[left] | self.lastPos[right]
+                else:
+                    self.lastPos[node] = self.lastPos[right]
+            elif op in [KLEENE_STAR_NODE, ONE_OR_MORE_NODE, ZERO_OR_ONE_NODE]:
+                self.firstPos[node] = self.firstPos[left]
+                self.lastPos[node] = self.lastPos[left]
+
+    def followPos(self):
+        '''
+        This function computes the followPos of every position.
+        '''
+        tree = self.abstractSyntaxTree
+        self.followPositions = [0] * (self.counter + 1)
+        for node, op in enumerate(tree.ops):
+            # If n is a cat-node with left child  c1 and right child c2, then every position i in lastpost(c1), all positions in firstpos(c2) are in followpos(i).
+            if op == CONCAT_NODE:
+                for i in bitPositions(self.lastPos[tree.left[node]]):
+                    self.followPositions[i] |= self.firstPos[tree.right[node]]
+            # if n is a star-node (or a one or more node), and i is a position in lastpos(n), then all positions in firstpos(n) ar in followpos(i).
+            elif op in [KLEENE_STAR_NODE, ONE_OR_MORE_NODE]:
+                for i in bitPositions(self.lastPos[node]):
+                    self.followPositions[i] |= self.firstPos[node]
     '''
     ↑↑ END ALGORITHMS ↑↑
     '''
@@ -8,6 +8,7 @@
 
 from src.utils.constants import RPAREN, LPAREN, OR, ZERO_OR_ONE, ONE_OR_MORE, KLEENE_STAR, CONCAT, OPERATORS_PRECEDENCE, TRIVIAL_CHARACTER_PRECEDENCE, LBRACKET, RBRACKET, SINGLE_QUOTE, DOUBLE_QUOTE, RANGE, WS, ANY_NOT_IN, UNIVERSE, HASHTAG
 from src.utils.tools import errorsManager
+from array import array
 
 
 class Expression(object):
@@ -129,6 +130,9 @@ class Expression(object):
                 skip_next = False
                 if inside_single_quote:
                     inside_single_quote_len += 1
+            elif not isinstance(c, str):
+                # A reference to the definition of an identifier is an operand by itself
+                result.append(c)
             elif c == '\\':
                 skip_next = True
             elif c == DOUBLE_QUOTE:
@@ -172,6 +176,15 @@ class Expression(object):
                 result.append(str(ord(c)))
         return result
 
+    def codify(self, text: str) -> bytes | array:
+        '''
+        Characters to integer codes. The codes are bytes when every character fits in a byte, otherwise an array of unsigned ints.
+        '''
+        try:
+            return text.encode('latin-1')
+        except UnicodeEncodeError:
+            return array('I', map(ord, text))
+
     def transformGroupsOfCharacters(self, infixRegEx: list) -> list:
         '''
         This function takes a regular expression in infix notation and returns the group of characters in the adequate format.
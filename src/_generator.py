@@ -0,0 +1,188 @@
+from src.utils.patterns import Pattern
+from src.utils.structures.symbol import Symbol
+from src.utils.tools import errorsManager
+from src._multi_dfa import MultiPatternDeterministicFiniteAutomaton as MultiDFA
+from src._min_dfa import MinimizedDeterministicFiniteAutomaton as MinDFA
+
+RETURN_KEYWORD = 'return'
+
+SCANNER_TEMPLATE = '''\
+"""
+Scanner generated by xcompi-c from {source}. Do not edit.
+"""
+
+# Equivalence class of every character code below 256, -1 if no rule uses it
+CLASSES = {classes}
+
+# Transition rows, identical rows are shared between states through STATE_ROW
+ROWS = {rows}
+STATE_ROW = {stateRow}
+
+START = {start}
+
+# Rule accepted by every state, -1 if the state does not accept
+ACCEPT = {accept}
+
+# Token returned by every rule, None if the lexeme is skipped
+ACTIONS = {actions}
+
+
+class LexerError(Exception):
+    pass
+
+
+def tokens(text: str):
+    \'\'\'
+    Yields (token, lexeme, position) for every lexeme of the text, using the longest match and the first rule on ties.
+    \'\'\'
+    position = 0
+    length = len(text)
+    while position < length:
+        state = START
+        rule = -1
+        end = position
+        forward = position
+        while forward < length:
+            code = ord(text[forward])
+            if code > 255 or CLASSES[code] < 0:
+                break
+            state = ROWS[STATE_ROW[state]][CLASSES[code]]
+            if state < 0:
+                break
+            forward += 1
+            if ACCEPT[state] >= 0:
+                rule = ACCEPT[state]
+                end = forward
+        if rule < 0:
+            raise LexerError(
+                f'No rule found for character "{{text[position]}}" at position {{position}}')
+        if ACTIONS[rule] is not None:
+            yield ACTIONS[rule], text[position:end], position
+        position = end
+
+
+if __name__ == '__main__':
+    import sys
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        for token, lexeme, position in tokens(f.read()):
+            print(position, token, repr(lexeme))
+'''
+
+
+class LexerGenerator(object):
+    '''
+    This class represents the generator of table driven scanners.
+    '''
+
+    def __init__(self, rules: list[tuple[list, str]]):
+        '''
+        This is the constructor of the class.
+        Parameters:
+        - rules: The alternatives of the rule, in priority order, as pairs of regular expression and action.
+        '''
+        self.errorsManager = errorsManager()
+        self.rules: list[tuple[list, str]] = rules
+        self.actions: list[str] = [
+            self.actionToken(action) for _, action in rules]
+        self.automaton: MinDFA = None
+
+    @staticmethod
+    def splitRule(symbols: list[Symbol], references: dict, alternative: str, action: str) -> list[tuple[list, str]]:
+        '''
+        This function splits the symbols of a rule into its alternatives, the identifiers are kept as references to their definitions.
+        Parameters:
+        - symbols: The symbols after the equal sign of the rule, without whitespace.
+        - references: The reference of each identifier.
+        - alternative: The name of the symbols that may hold the alternation operator.
+        - action: The name of the symbols that hold an action.
+        Returns:
+        - A list of pairs of regular expression, as characters and references, and action (None if the alternative has no action).
+        '''
+        rules = []
+        expression = []
+        currentAction = None
+        for symbol in symbols:
+            if symbol.type == alternative and symbol.original == '|':
+                rules.append((expression, currentAction))
+                expression = []
+                currentAction = None
+            elif symbol.type == action:
+                currentAction = symbol.original
+            elif symbol.original in references:
+                expression.append(references[symbol.original])
+            else:
+                expression.extend(symbol.original)
+        rules.append((expression, currentAction))
+        return rules
+
+    def actionToken(self, action: str) -> str:
+        '''
+        This function returns the token of an action like "{ return ID }", or None if the action does not return anything.
+        '''
+        if action is None:
+            return None
+        words = action.strip('{}').split()
+        if len(words) == 2 and words[0] == RETURN_KEYWORD:
+            return words[1]
+        if words:
+            self.errorsManager.addError(
+                f'Action \"{action}\" is not supported',
+                'The lexemes of the alternative will be skipped.')
+        return None
+
+    def build(self) -> MinDFA:
+        '''
+        This function builds the minimized DFA that recognizes every alternative, its acceptance states are labeled with the index of the alternative.
+        '''
+        patterns = [Pattern(f'RULE_{idx}', expression)
+                    for idx, (expression, _) in enumerate(self.rules)]
+        multiDFA = MultiDFA([pattern.min_dir_dfa for pattern in patterns],
+                            list(range(len(patterns))))
+        self.automaton = MinDFA(multiDFA, multiDFA.alphabet)
+        return self.automaton
+
+    def emit(self, source: str) -> str:
+        '''
+        This function returns the source code of a standalone Python module that scans using the tables of the automaton.
+        Parameters:
+        - source: The name of the file the rule comes from.
+        '''
+        if self.automaton is None:
+            self.build()
+        automaton = self.automaton
+
+        # Only character codes can reach the generated scanner, other symbols are dropped
+        classes = [-1] * 256
+        for symbol, column in automaton.columns.items():
+            if symbol.isdigit() and int(symbol) < 256:
+                classes[int(symbol)] = column
+
+        rows = []
+        rowIndex = {}
+        stateRow = []
+        for row in automaton.table:
+            row = tuple(row)
+            if row not in rowIndex:
+                rowIndex[row] = len(rows)
+                rows.append(row)
+            stateRow.append(rowIndex[row])
+
+        accept = [label if accepting else -1 for label,
+                  accepting in zip(automaton.labels, automaton.accepting)]
+
+        return SCANNER_TEMPLATE.format(
+            source=source,
+            classes=tuple(classes),
+            rows=tuple(rows),
+            stateRow=tuple(stateRow),
+            start=automaton.stateIndex[automaton.initialState.id],
+            accept=tuple(accept),
+            actions=tuple(self.actions),
+        )
+
+    def write(self, path: str, source: str) -> None:
+        '''
+        This function writes the generated scanner module to the path.
+        '''
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.emit(source))
@@ -0,0 +1,155 @@
+from ._dir_dfa import DirectDeterministicFiniteAutomaton as DirDFA
+from ._ast import FlatAbstractSyntaxTree
+from .utils.structures.tree_node import TreeNode
+from .utils.constants import TERMINATOR, LAZY_DFA_CACHE_SIZE, WS_CODE, SINGLE_QUOTE_CODE, UNQUOTED_WS_CODE
+from .utils.instrumentation import instrumentation
+from .utils.tools import bitPositions
+
+
+class LazyDeterministicFiniteAutomaton(DirDFA):
+    '''
+    This class represents a deterministic finite automaton whose states are built on demand, while the input is walked.
+    A state is the bitmask of its positions, as in the direct construction. The transitions found are kept in a cache of at most cacheSize states, which is flushed when it is full, so memory is bounded however large the pattern is.
+    '''
+
+    instrumentationName: str = 'lazy_dfa'
+
+    def __init__(self, abstractSyntaxTree: FlatAbstractSyntaxTree | TreeNode, cacheSize: int = LAZY_DFA_CACHE_SIZE) -> None:
+        '''
+        This is the constructor of the class.
+        Parameters:
+        - ast: The abstract syntax tree of a regular expression, flat or as the root TreeNode.
+        - cacheSize: The amount of states kept in the cache.
+        '''
+        self.cacheSize: int = cacheSize
+        # Positions mask -> the positions mask reached with each class, None while unknown
+        self.cache: dict = {}
+        # The positions that hold each class
+        self.classPositions: list[int] = []
+        self.terminatorMask: int = 0
+        self.initialMask: int = 0
+        self.flushes: int = 0
+
+        super().__init__(abstractSyntaxTree)
+
+    def countBuild(self):
+        '''
+        This method is made for add the amount of positions of the automaton built to the counters, its states are counted as they are built.
+        '''
+        instrumentation.count('lazy_dfa.positions', self.counter)
+
+    def build(self):
+        '''
+        This method is made for build the automaton.
+
+        Specific: Only the initial state and the positions of each class are computed, the states are built by walk and simulate.
+        '''
+        self.classPositions = [0] * len(self.alphabet)
+        for position, symbols in self.symbols.items():
+            if symbols == TERMINATOR:
+                self.terminatorMask |= 1 << position
+                continue
+            for symbol in symbols:
+                self.classPositions[symbol] |= 1 << position
+        self.initialMask = self.firstPos[self.abstractSyntaxTree.root]
+
+    def postprocessing(self):
+        '''
+        This method is made for postprocessing the automaton. There are no states to rename.
+        '''
+        pass
+
+    def freeze(self):
+        '''
+        This method is made for map the integer symbols of the codified input to their classes, the classes are the columns of the cache.
+        '''
+        self.byteClasses = self.byteClassesOf(self.classOf)
+
+    '''
+    ↓↓ ALGORITHMS ↓↓
+    '''
+
+    def addState(self, mask: int) -> list:
+        '''
+        This function adds a state to the cache, flushing it first when it is full.
+        Returns:
+        - The transitions of the state, all unknown.
+        '''
+        if len(self.cache) >= self.cacheSize:
+            self.cache.clear()
+            self.flushes += 1
+            instrumentation.count('lazy_dfa.flushes')
+        transitions = [None] * len(self.alphabet)
+        self.cache[mask] = transitions
+        instrumentation.count('lazy_dfa.states')
+        return transitions
+
+    def move(self, mask: int, symbolClass: int) -> int:
+        '''
+        This function computes the transition of a state with a class: the union of followpos(p) for every position p of the state that holds the class.
+        Returns:
+        - The positions mask reached, 0 when the automaton gets stuck.
+        '''
+        U = 0
+        for position in bitPositions(mask & self.classPositions[symbolClass]):
+            U |= self.followPositions[position]
+        return U
+
+    def simulate(self, input: bytes, start: int = 0, end: int = None):
+        '''
+        This method is made for simulate the automaton, as Automaton.simulate.
+        Returns:
+        - If the automaton accepts, and the amount of characters consumed from start.
+        '''
+        end = len(input) if end is None else end
+        _, length, stop = self.walk(input, start, end)
+        if stop < end:
+            return False, stop - start
+        if end == start:
+            return bool(self.initialMask & self.terminatorMask), 0
+        return length == end - start, end - start
+
+    def walk(self, input: bytes, start: int = 0, end: int = None) -> tuple:
+        '''
+        This method is made for walk the input from the start offset looking for the longest accepted prefix, as Automaton.walk, building the states it needs.
+        Returns:
+        - None (the automaton is not labeled), the length of the longest accepted prefix, and the index where the walk stopped.
+        '''
+        cache = self.cache
+        byteClasses = self.byteClasses
+        terminatorMask = self.terminatorMask
+        size = len(input)
+        end = size if end is None else end
+        mask = self.initialMask
+        length = 0
+        stop = end
+        for idx in range(start, end):
+            symbol = input[idx]
+            if symbol == WS_CODE:
+                if not (0 < idx < size - 1 and input[idx - 1] == SINGLE_QUOTE_CODE and input[idx + 1] == SINGLE_QUOTE_CODE):
+                    symbol = UNQUOTED_WS_CODE
+            elif symbol >= UNQUOTED_WS_CODE:
+                stop = idx
+                break
+            column = byteClasses[symbol]
+            if column < 0:
+                stop = idx
+                break
+            transitions = cache.get(mask)
+            if transitions is None:
+                transitions = self.addState(mask)
+            target = transitions[column]
+            if target is None:
+                target = transitions[column] = self.move(mask, column)
+            if not target:
+                stop = idx
+                break
+            mask = target
+            if mask & terminatorMask:
+                length = idx + 1 - start
+        if instrumentation.enabled:
+            instrumentation.count('automaton.steps', stop - start)
+        return None, length, stop
+    '''
+    ↑↑ END ALGORITHMS ↑↑
+    '''
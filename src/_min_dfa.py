@@ -1,6 +1,8 @@
 from .models._automaton import Automaton
+from .utils.instrumentation import instrumentation
 from .utils.structures.transition import Transition
 from .utils.structures.state import State
+from .utils.constants import HOPCROFT, MOORE
 
 
 class MinimizedDeterministicFiniteAutomaton(Automaton):
@@ -8,14 +10,38 @@ class MinimizedDeterministicFiniteAutomaton(Automaton):
     This class represents a minimized finite automaton.
     '''
 
-    def __init__(self, dfa: Automaton, alphabet: set[str]) -> None:
+    def __init__(self, dfa: Automaton, alphabet: set[str], algorithm: str = HOPCROFT) -> None:
+        '''
+        This is the constructor of the class.
+        Parameters:
+        - dfa: The deterministic finite automaton to minimize.
+        - alphabet: The symbols of the automaton.
+        - algorithm: The partition refinement to use, HOPCROFT (default) or MOORE, the latter is simpler and kept for cross-checking.
+        '''
         super().__init__()
 
         self.dfa: Automaton = dfa
         self.alphabet: set[str] = alphabet
+        self.algorithm: str = algorithm
         self.counter: int = 0
+        self.delta: dict = {}
+        self.classOf = dfa.classOf
 
-        self.build()
+        with instrumentation.span('min_dfa.build'):
+            self.preprocess()
+            self.build()
+            self.freeze()
+        instrumentation.count('min_dfa.states', len(self.states))
+        instrumentation.count('min_dfa.transitions', len(self.transitions))
+
+    def preprocess(self):
+        '''
+        This method is made for preprocess the automaton.
+
+        Specific: Index the transitions of the DFA by (state, symbol).
+        '''
+        self.delta = {(transition.tail_id, transition.using): transition.head_id
+                      for transition in self.dfa.transitions}
 
     def build(self):
         '''
@@ -24,43 +50,35 @@ class MinimizedDeterministicFiniteAutomaton(Automaton):
         Specific: Minimize the deterministic finite automaton.
         @Reference: Algorithm 3.39 : Minimizing the number of states of a DFA. Aho - Compilers: Principles, Techniques, and Tools (2nd Edition)
         '''
-        F = [state.id for state in self.dfa.acceptanceStates]
-        S_F = [state.id for state in self.dfa.states if state.id not in F]
-        II = [F, S_F]
-
-        IInew = self.partition(II)
-
-        while IInew != II:
-            II = IInew
-            IInew = self.partition(II)
-
-        IIfinal = II
+        if self.algorithm == MOORE:
+            IIfinal = self.moore()
+        elif self.algorithm == HOPCROFT:
+            IIfinal = self.hopcroft()
+        else:
+            raise ValueError(f'Unknown minimization algorithm {self.algorithm}')
+
+        IIfinal = [group for group in IIfinal if group]
         representatives = [group[0] for group in IIfinal]
+        groupOf = {id: i for i, group in enumerate(IIfinal) for id in group}
 
-        start_state = None
-        for i, group in enumerate(IIfinal):
-            if self.dfa.initialState.id in group:
-                start_state = representatives[i]
-                break
+        start_state = representatives[groupOf[self.dfa.initialState.id]]
 
         acceptance_states = []
-        for i, group in enumerate(IIfinal):
-            if any(state.id in group for state in self.dfa.acceptanceStates):
-                acceptance_states.append(representatives[i])
+        for state in self.dfa.acceptanceStates:
+            if state.id in groupOf:
+                representative = representatives[groupOf[state.id]]
+                if representative not in acceptance_states:
+                    acceptance_states.append(representative)
+                if state.id in self.dfa.acceptanceLabels:
+                    self.acceptanceLabels[representative] = self.dfa.acceptanceLabels[state.id]
 
         transitions = []
-        for i, group in enumerate(IIfinal):
+        for representative in representatives:
             for a in self.alphabet:
-                next_state = None
-                for transition in self.dfa.transitions:
-                    if transition.tail_id == representatives[i] and transition.using == a:
-                        next_state = transition.head_id
-                        break
-                for j, next_group in enumerate(IIfinal):
-                    if next_state in next_group:
-                        transitions.append(Transition(
-                            representatives[i], representatives[j], a))
-                        break
+                next_state = self.delta.get((representative, a))
+                if next_state in groupOf:
+                    transitions.append(Transition(
+                        representative, representatives[groupOf[next_state]], a))
 
         self.initialState = State(start_state, start_state, initial=True)
         self.states = [State(representative, representative)
@@ -73,31 +91,111 @@ class MinimizedDeterministicFiniteAutomaton(Automaton):
     ↓↓ ALGORITHMS ↓↓
     '''
 
-    def partition(self, II: list[list[int]]):
+    def moore(self) -> list[list[int]]:
+        '''
+        Moore partition refinement, every round refines all the groups until nothing changes.
+        As in hopcroft, the DFA is completed with a sink state (None) and acceptance states are only equivalent if they carry the same label, so both give the same groups.
+        '''
+        initialGroups = {}
+        for state in self.dfa.acceptanceStates:
+            label = self.dfa.acceptanceLabels.get(state.id)
+            initialGroups.setdefault(label, []).append(state.id)
+        accepting = set(id for group in initialGroups.values() for id in group)
+        S_F = [state.id for state in self.dfa.states if state.id not in accepting]
+        II = list(initialGroups.values()) + [S_F + [None]]
+
+        IInew = self.partition(II)
+
+        # Groups are only ever split, so the partition is stable when their amount does not change
+        while len(IInew) != len(II):
+            II = IInew
+            IInew = self.partition(II)
+
+        initial = self.dfa.initialState.id
+        return [sorted(id for id in group if id is not None)
+                for group in II if None not in group or initial in group]
+
+    def partition(self, II: list[list[int]]) -> list[list[int]]:
+        '''
+        This method is made for split every group by the groups its states go to with each symbol, a missing transition goes to the sink state.
+        '''
+        groupOf = {id: i for i, group in enumerate(II) for id in group}
         IInew = []
         for G in II:
             subgroups = {}
             for id in G:
-                key = []
-                for a in self.alphabet:
-                    next_state = None
-                    for transition in self.dfa.transitions:
-                        if transition.tail_id == id and transition.using == a:
-                            next_state = transition.head_id
-                            break
-                    for i, group in enumerate(II):
-                        if next_state in group:
-                            if i != id:
-                                key.append(i)
-                                break
-                key = tuple(key)
-                if key not in subgroups:
-                    subgroups[key] = []
-                subgroups[key].append(id)
-
+                key = tuple(groupOf[self.delta.get((id, a))]
+                            for a in self.alphabet)
+                subgroups.setdefault(key, []).append(id)
             IInew.extend(subgroups.values())
 
         return IInew
+
+    def hopcroft(self) -> list[list[int]]:
+        '''
+        Hopcroft partition refinement, O(n·|Σ|·log n). Only the blocks split by a (splitter, symbol) pair are refined, and only the smaller half of a split is queued again.
+        The DFA is completed with a sink state, the block that holds it is dropped from the result unless it holds the initial state too.
+        @Reference: Hopcroft, J. An n log n algorithm for minimizing states in a finite automaton (1971)
+        '''
+        ids = [state.id for state in self.dfa.states]
+        sink = len(ids)
+        index = {id: i for i, id in enumerate(ids)}
+        symbols = list(self.alphabet)
+
+        # inverse[a][q] holds every state p such that delta(p, a) = q
+        inverse = [[[] for _ in range(sink + 1)] for _ in symbols]
+        for a, symbol in enumerate(symbols):
+            for p, id in enumerate(ids):
+                head = self.delta.get((id, symbol))
+                inverse[a][sink if head is None else index[head]].append(p)
+            inverse[a][sink].append(sink)
+
+        # Acceptance states are only equivalent if they carry the same label
+        initialBlocks = {}
+        for state in self.dfa.acceptanceStates:
+            label = self.dfa.acceptanceLabels.get(state.id)
+            initialBlocks.setdefault(label, set()).add(index[state.id])
+        accepting = set().union(*initialBlocks.values())
+        blocks = [block for block in initialBlocks.values()]
+        blocks.append(set(range(sink + 1)) - accepting)
+
+        blockOf = [0] * (sink + 1)
+        for b, block in enumerate(blocks):
+            for p in block:
+                blockOf[p] = b
+
+        largest = max(range(len(blocks)), key=lambda b: len(blocks[b]))
+        waiting = set((b, a) for b in range(len(blocks)) if b != largest
+                      for a in range(len(symbols)))
+
+        while waiting:
+            B, a = waiting.pop()
+            touched = {}
+            for q in blocks[B]:
+                for p in inverse[a][q]:
+                    touched.setdefault(blockOf[p], set()).add(p)
+
+            for Y, X in touched.items():
+                if len(X) == len(blocks[Y]):
+                    continue
+                blocks[Y] -= X
+                Z = len(blocks)
+                blocks.append(X)
+                for p in X:
+                    blockOf[p] = Z
+                for c in range(len(symbols)):
+                    if (Y, c) in waiting or len(X) <= len(blocks[Y]):
+                        waiting.add((Z, c))
+                    else:
+                        waiting.add((Y, c))
+
+        initial = index[self.dfa.initialState.id]
+        II = []
+        for block in blocks:
+            if sink in block and initial not in block:
+                continue
+            II.append(sorted(ids[p] for p in block if p != sink))
+        return II
     '''
     ↑↑ END ALGORITHMS ↑↑
     '''
@@ -0,0 +1,120 @@
+from .models._automaton import Automaton
+from .utils.instrumentation import instrumentation
+from .utils.structures.state import State
+from .utils.structures.transition import Transition
+from collections import deque
+
+from .utils.tools import numberToLetter
+
+
+class MultiPatternDeterministicFiniteAutomaton(Automaton):
+    '''
+    This class represents a deterministic finite automaton that recognizes several patterns at once.
+    '''
+
+    def __init__(self, automata: list[Automaton], labels: list[str]) -> None:
+        '''
+        This is the constructor of the class.
+        Parameters:
+        - automata: The deterministic automata of the patterns, in priority order.
+        - labels: The label carried by the acceptance states of each automaton.
+        '''
+        super().__init__()
+
+        self.automata: list[Automaton] = automata
+        self.patternLabels: list[str] = labels
+        self.alphabet: list[int] = []
+        # The column each class uses in every automaton, -1 if the automaton does not know the class
+        self.classColumns: list[tuple] = []
+        self.classOf: dict = {}
+
+        with instrumentation.span('multi_dfa.build'):
+            self.preprocess()
+            self.build()
+            self.postprocessing()
+            self.freeze()
+        instrumentation.count('multi_dfa.states', len(self.states))
+        instrumentation.count('multi_dfa.transitions', len(self.transitions))
+
+    def preprocess(self):
+        '''
+        This method is made for preprocess the automaton.
+
+        Specific: Freeze the automata of the patterns and split the union of their alphabets into equivalence classes, two symbols share a class when every automaton maps them to the same column.
+        '''
+        symbols = []
+        seen = set()
+        for automaton in self.automata:
+            if automaton.table is None:
+                automaton.freeze()
+            for symbol in automaton.columns:
+                if symbol not in seen:
+                    seen.add(symbol)
+                    symbols.append(symbol)
+
+        classes = {}
+        for symbol in symbols:
+            signature = tuple(automaton.columns.get(symbol, -1)
+                              for automaton in self.automata)
+            if signature not in classes:
+                classes[signature] = len(classes)
+                self.classColumns.append(signature)
+            self.classOf[symbol] = classes[signature]
+        self.alphabet = list(range(len(classes)))
+
+    def build(self):
+        '''
+        This method is made for build the automaton.
+
+        Specific: Product construction over the automata of the patterns. Each state is a tuple with the current row of every automaton (-1 once it is dead), and an acceptance state is labeled with the first pattern, in priority order, that accepts on it.
+        '''
+        start = tuple(automaton.stateIndex[automaton.initialState.id]
+                      for automaton in self.automata)
+        ids = {start: 0}
+        self.initialState = State(start, 0, initial=True)
+        self.states.append(self.initialState)
+
+        queue = deque([start])
+        while queue:
+            S = queue.popleft()
+            self.label(S, ids[S])
+
+            for symbol in self.alphabet:
+                U = tuple(
+                    automaton.table[row][column]
+                    if row >= 0 and column >= 0 else -1
+                    for automaton, row, column in zip(self.automata, S, self.classColumns[symbol])
+                )
+                if all(row < 0 for row in U):
+                    continue
+                if U not in ids:
+                    ids[U] = len(ids)
+                    self.states.append(State(U, ids[U]))
+                    queue.append(U)
+                self.transitions.append(Transition(ids[S], ids[U], symbol))
+
+    def postprocessing(self):
+        '''
+        This method is made for postprocessing the automaton. And rename the state.value to letters based on the state.id
+        '''
+        for state in self.states:
+            state.value = numberToLetter(state.id+1).upper()
+
+    '''
+    ↓↓ ASSOCIATED FUNCTIONS ↓↓
+    '''
+
+    def label(self, S: tuple, id: int):
+        '''
+        This function marks the state as acceptance state if any of the automata accepts on it, using the label of the one with the highest priority.
+        '''
+        for idx, row in enumerate(S):
+            if row >= 0 and self.automata[idx].accepting[row]:
+                state = self.states[id]
+                state.acceptance = True
+                self.acceptanceStates.append(state)
+                self.acceptanceLabels[id] = self.patternLabels[idx]
+                break
+    '''
+    ↑↑ END ASSOCIATED FUNCTIONS ↑↑
+    '''
@@ -1,7 +1,92 @@
 from src.utils.patterns import Pattern
 from src.utils.structures.symbol import Symbol
+from src.utils.structures.symbol_table import SymbolTable
 from src._expression import Expression
+from src._multi_dfa import MultiPatternDeterministicFiniteAutomaton as MultiDFA
 from src.utils.tools import errorsManager
+from src.utils.instrumentation import instrumentation
+from src.utils.constants import STREAM_CHUNK_SIZE, PARALLEL_CHUNK_SIZE, LAZY
+from typing import BinaryIO, Iterator, Callable
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from bisect import bisect_left
+import codecs
+import os
+from array import array
+
+# State of each process of the parallel tokenizer, set once by initChunkWorker
+chunkWorker: dict = {}
+
+
+def initChunkWorker(multiDFA: MultiDFA, matchers: dict, codified: bytes):
+    '''
+    This function is made for receive, once per process, the automata and the input of the parallel tokenizer.
+    Parameters:
+    - multiDFA: The automaton of all the patterns, None when the patterns are walked with their own matchers.
+    - matchers: The matcher of each pattern, by name, used when there is no multiDFA.
+    - codified: The codified source.
+    '''
+    if multiDFA is not None:
+        chunkWorker['longestMatch'] = multiDFA.longestMatch
+    else:
+        chunkWorker['longestMatch'] = partial(longestMatchOf, matchers)
+    chunkWorker['codified'] = codified
+
+
+def longestMatchOf(matchers: dict, codified: bytes, forward: int) -> tuple:
+    '''
+    This function finds the longest lexeme from the forward pointer walking each matcher, the first matcher wins a tie.
+    Parameters:
+    - matchers: The matcher of each pattern, by name.
+    - codified: The codified source.
+    - forward: The offset where the lexeme begins.
+    Returns:
+    - The name of the pattern and the length of the lexeme, or (None, 0) if no pattern matches.
+    '''
+    match = (None, 0)
+    for name, matcher in matchers.items():
+        _, length = matcher.longestMatch(codified, forward)
+        if length > match[1]:
+            match = (name, length)
+    return match
+
+
+def walkOf(matchers: dict, codified: bytes, forward: int, end: int) -> tuple:
+    '''
+    This function walks each matcher from the forward pointer, as Automaton.walk does with a single automaton, the first matcher wins a tie.
+    Returns:
+    - The name of the pattern and the length of the longest lexeme, and the furthest index where a walk stopped.
+    '''
+    name, length, stop = None, 0, forward
+    for patternName, matcher in matchers.items():
+        _, patternLength, patternStop = matcher.walk(codified, forward, end)
+        if patternLength > length:
+            name, length = patternName, patternLength
+        stop = max(stop, patternStop)
+    return name, length, stop
+
+
+def lexChunk(bounds: tuple) -> tuple:
+    '''
+    This function is made for lex speculatively a chunk of the input, as if a token began at its first character.
+    Parameters:
+    - bounds: The offsets where the chunk begins and ends. The last token may go beyond the end.
+    Returns:
+    - The starts, lengths and names of the tokens that begin inside the chunk, and the offset where no pattern matched (None if every token matched).
+    '''
+    longestMatch = chunkWorker['longestMatch']
+    codified = chunkWorker['codified']
+    forward, end = bounds
+    starts, lengths, names = [], [], []
+    while forward < end:
+        name, length = longestMatch(codified, forward)
+        if length == 0:
+            return starts, lengths, names, forward
+        starts.append(forward)
+        lengths.append(length)
+        names.append(name)
+        forward += length
+    return starts, lengths, names, None
 
 
 class Tokenizer(object):
@@ -9,47 +94,102 @@ class Tokenizer(object):
     This class represents the lexer module.
     '''
 
-    def __init__(self, sourceCode: str = None):
+    def __init__(self, sourceCode: str | bytes = None):
         '''
         This is the constructor of the class.
         Parameters:
-        - sourceCode: The source code to be tokenized.
+        - sourceCode: The source code to be tokenized, as text or as bytes (bytes, bytearray or memoryview), where every byte is a character.
         '''
-        self.sourceCode: str = sourceCode
+        self.sourceCode: str | bytes = sourceCode
         if sourceCode is not None:
             self.codifySourceCode()
         self.patterns: dict = {}
+        # Names of the patterns that are matched but never become symbols
+        self.skipped: set = set()
+        self.multiDFA: MultiDFA = None
         self.sequences: dict = {}
-        self.symbolsTable: list[Symbol] = []
+        self.symbolsTable: SymbolTable = SymbolTable()
         self.errorsManager = errorsManager()
 
-    def addPatterns(self, patterns: list[Pattern]) -> None:
+    def addPatterns(self, patterns: list[Pattern], skip: bool = False) -> None:
         '''
         This function adds a list of patterns to the patterns dictionary.
         Parameters:
         - patterns: A list of pattern objects.
+        - skip: If the lexemes of the patterns are matched but not added to the symbols table.
         '''
         for pattern in patterns:
-            self.addPattern(pattern)
+            self.addPattern(pattern, skip)
 
-    def addPattern(self, pattern: Pattern) -> None:
+    def addPattern(self, pattern: Pattern, skip: bool = False) -> None:
         '''
         This function adds a pattern to the patterns dictionary.
         Parameters:
         - pattern: A pattern object.
+        - skip: If the lexemes of the pattern are matched but not added to the symbols table. It still takes part in the longest match.
         '''
         self.patterns[pattern.name] = pattern
+        if skip:
+            self.skipped.add(pattern.name)
+        else:
+            self.skipped.discard(pattern.name)
+        self.multiDFA = None
+
+    def getMultiDFA(self) -> MultiDFA:
+        '''
+        This function returns the automaton that recognizes all the registered patterns at once, building it if the patterns changed.
+        '''
+        if self.multiDFA is None:
+            self.multiDFA = MultiDFA(
+                [pattern.min_dir_dfa for pattern in self.patterns.values()],
+                [pattern.name for pattern in self.patterns.values()]
+            )
+        return self.multiDFA
+
+    def usesMultiDFA(self) -> bool:
+        '''
+        This function tells if the patterns are walked together, in the automaton of getMultiDFA.
+        A single pattern, or patterns whose memory must stay bounded, are walked with their own matchers, so no whole DFA is built for a LAZY pattern.
+        '''
+        return len(self.patterns) > 1 and all(pattern.engine != LAZY for pattern in self.patterns.values())
+
+    def getMatchers(self) -> dict:
+        '''
+        This function returns the matcher of each pattern, by name.
+        '''
+        return {pattern.name: pattern.matcher for pattern in self.patterns.values()}
+
+    def getLongestMatch(self) -> Callable:
+        '''
+        This function returns the function that finds the longest lexeme from an offset, and the name of its pattern, over all the patterns.
+        '''
+        if self.usesMultiDFA():
+            return self.getMultiDFA().longestMatch
+        return self.longestPatternMatch
 
     def codifySourceCode(self):
         '''
-        This function codifies the source code.
+        This function codifies the source code into integer symbols. Bytes are used as they are.
         '''
         self.expr = Expression(self.sourceCode)
 
-        self.unCodified = self.expr.infixRegEx
-        self.codified = self.expr.softCodify(
-            self.expr.infixRegEx
-        )
+        self.unCodified = self.sourceCode
+        if isinstance(self.sourceCode, str):
+            self.codified = self.expr.codify(self.sourceCode)
+        else:
+            self.codified = self.sourceCode
+
+    def resetSource(self, codified: bytes, unCodified: str):
+        '''
+        This function replaces the source of the lexer, and clears its symbols and errors, so a lexer with its patterns ready can be reused.
+        Parameters:
+        - codified: The codified source, as integer symbols.
+        - unCodified: The original source.
+        '''
+        self.codified = codified
+        self.unCodified = unCodified
+        self.symbolsTable.clear()
+        self.errorsManager.clear()
 
     def removeSymbols(self, withPatterns: list[Pattern]):
         '''
@@ -57,28 +197,27 @@ class Tokenizer(object):
         Parameters:
         - withPatterns: A list of patterns.
         '''
-        self.symbolsTable: list[Symbol] = list(
-            filter(lambda symbol: symbol.type not in [pattern.name for pattern in withPatterns],
-                   self.symbolsTable)
-        )
+        self.symbolsTable.removeTypes(
+            [pattern.name for pattern in withPatterns])
 
-    def removeSymbolsByMatch(self, withPattern: Pattern):
-        removedAmount = 0
-        internal_lexer = Tokenizer()
-        internal_lexer.addPatterns([withPattern])
+    def removeSymbolsByMatch(self, withPattern: Pattern) -> int:
+        '''
+        This function removes the symbols of the withPattern type whose lexeme begins with a match of the pattern.
+        Parameters:
+        - withPattern: A pattern object.
+        Returns:
+        - The amount of symbols removed.
+        '''
+        matcher = withPattern.matcher
+        keep = []
         for symbol in self.symbolsTable:
             if symbol.type != withPattern.name:
+                keep.append(True)
                 continue
+            _, length = matcher.longestMatch(symbol.content)
+            keep.append(length == 0)
 
-            internal_lexer.codified = symbol.content
-            internal_lexer.unCodified = symbol.original
-            internal_lexer.tokenize()
-
-            if len(internal_lexer.symbolsTable) != 0:
-                self.symbolsTable.remove(symbol)
-                removedAmount += 1
-
-        return removedAmount
+        return self.symbolsTable.compress(keep)
 
     def addSequence(self, sequenceID: str, sequence: list):
         '''
@@ -93,24 +232,48 @@ class Tokenizer(object):
         '''
         This function tokenizes the source code.
         '''
+        emitted = len(self.symbolsTable)
+        with instrumentation.span('tokenizer.tokenize'):
+            self.scan(usingLongestMatch)
+        instrumentation.count('tokenizer.tokens', len(self.symbolsTable) - emitted)
+
+    def scan(self, usingLongestMatch: bool = True):
+        '''
+        This function walks the patterns over the source code, appending a symbol for each lexeme found.
+        '''
         # This pointer will point to the current character being analyzed.
 
         forward = 0
         # Strategy:
         # 1. Iterate over the source code.
         # 2. For each character in the source code, check if the current character is a prefix of any pattern.
-        # This will be done by sending the entire source code to the DFAs of each pattern.
+        # This will be done by walking the DFAs of each pattern over the source code, from the forward pointer.
         # If it is true, then we will get the longest match, and update the lexemeBegin and forward pointers.
 
         codified = self.codified
-        unCodified = self.unCodified
+        # The lexemes are kept as offsets over the sources
+        source = self.symbolsTable.addSource(codified, self.unCodified)
+        add = self.symbolsTable.add
+        skipped = self.skipped
+
+        if usingLongestMatch:
+            # Several patterns are walked together, in a single automaton whose acceptance states are labeled with the pattern name.
+            longestMatch = self.getLongestMatch()
+            while forward < len(codified):
+                name, length = longestMatch(codified, forward)
+                if length == 0:
+                    self.errorsManager.addError(
+                        f'No pattern found for character \"{chr(codified[forward])}\" at position \"{forward}\"', 'Not all characters were tokenized')
+                    break
+                if name not in skipped:
+                    add(name, forward, forward + length, source)
+                forward += length
+            return
 
         while forward < len(codified):
             match = None
             for pattern in self.patterns.values():
-                _, idx = pattern.min_dir_dfa.simulate(
-                    codified[forward:]
-                )
+                _, idx = pattern.matcher.simulate(codified, forward)
                 if match is None:
                     if idx > 0:
                         match = (pattern.name, idx)
@@ -122,12 +285,138 @@ class Tokenizer(object):
                         if idx < match[1] and idx > 0:
                             match = (pattern.name, idx)
             if match is not None:
-                # Save also the original
-                self.symbolsTable.append(Symbol(
-                    match[0], codified[forward:forward + match[1]], unCodified[forward:forward + match[1]], forward))
+                if match[0] not in skipped:
+                    add(match[0], forward, forward + match[1], source)
                 forward += match[1]
             else:
 
                 self.errorsManager.addError(
-                    f'No pattern found for character \"{unCodified[forward]}\" at position \"{forward}\"', 'Not all characters were tokenized')
+                    f'No pattern found for character \"{chr(codified[forward])}\" at position \"{forward}\"', 'Not all characters were tokenized')
                 break
+
+    def longestPatternMatch(self, codified: bytes, forward: int) -> tuple:
+        '''
+        This function finds the longest lexeme from the forward pointer walking the matcher of each pattern, the first pattern added wins a tie.
+        Returns:
+        - The name of the pattern and the length of the lexeme, or (None, 0) if no pattern matches.
+        '''
+        return longestMatchOf(self.getMatchers(), codified, forward)
+
+    def tokenizeParallel(self, workers: int = None, chunkSize: int = PARALLEL_CHUNK_SIZE):
+        '''
+        This function tokenizes the source code, using the longest match, across a pool of processes. The symbols are the same as with tokenize.
+        The input is split in chunks, and each chunk is lexed as if a token began at its first character. Then the chunks are stitched in order: from where the true token stream enters a chunk it is lexed sequentially until it reaches a start of the speculative tokens, from there both streams agree and the speculative tokens are taken as they are.
+        Parameters:
+        - workers: The amount of processes, the amount of CPUs by default.
+        - chunkSize: The amount of characters of each chunk.
+        '''
+        codified = self.codified
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or len(codified) <= chunkSize:
+            self.tokenize()
+            return
+
+        multiDFA = self.getMultiDFA() if self.usesMultiDFA() else None
+        matchers = None if multiDFA is not None else self.getMatchers()
+        bounds = [(start, min(start + chunkSize, len(codified)))
+                  for start in range(0, len(codified), chunkSize)]
+        shared = codified.tobytes() if isinstance(codified, memoryview) else codified
+        with instrumentation.span('tokenizer.chunks'):
+            with ProcessPoolExecutor(max_workers=workers, initializer=initChunkWorker, initargs=(multiDFA, matchers, shared)) as executor:
+                chunks = list(executor.map(lexChunk, bounds))
+
+        emitted = len(self.symbolsTable)
+        with instrumentation.span('tokenizer.stitch'):
+            self.stitch(bounds, chunks)
+        instrumentation.count('tokenizer.tokens', len(self.symbolsTable) - emitted)
+
+    def stitch(self, bounds: list[tuple], chunks: list[tuple]):
+        '''
+        This function appends the symbols of the true token stream, taking the speculative tokens of each chunk from where both streams agree.
+        Parameters:
+        - bounds: The offsets where each chunk begins and ends.
+        - chunks: The speculative tokens of each chunk, as lexChunk returns them.
+        '''
+        codified = self.codified
+        source = self.symbolsTable.addSource(codified, self.unCodified)
+        add = self.symbolsTable.add
+        skipped = self.skipped
+        longestMatch = self.getLongestMatch()
+        forward = 0
+        for (_, end), (starts, lengths, names, errorAt) in zip(bounds, chunks):
+            while forward < end:
+                idx = bisect_left(starts, forward)
+                if idx < len(starts) and starts[idx] == forward:
+                    # Resynchronized, the rest of the chunk is the speculative stream
+                    for start, length, name in zip(starts[idx:], lengths[idx:], names[idx:]):
+                        if name not in skipped:
+                            add(name, start, start + length, source)
+                    forward = starts[-1] + lengths[-1]
+                    if errorAt is None:
+                        break
+                if forward == errorAt:
+                    self.errorsManager.addError(
+                        f'No pattern found for character \"{chr(codified[forward])}\" at position \"{forward}\"', 'Not all characters were tokenized')
+                    return
+
+                name, length = longestMatch(codified, forward)
+                if length == 0:
+                    self.errorsManager.addError(
+                        f'No pattern found for character \"{chr(codified[forward])}\" at position \"{forward}\"', 'Not all characters were tokenized')
+                    return
+                if name not in skipped:
+                    add(name, forward, forward + length, source)
+                forward += length
+
+    def stream(self, source: BinaryIO, chunkSize: int = STREAM_CHUNK_SIZE) -> Iterator[Symbol]:
+        '''
+        This function tokenizes a binary file-like object, using the longest match, and yields the symbols as they are found.
+        The source is read in chunks and decoded as UTF-8. Only the characters from the start of the current lexeme are kept, so memory does not grow with the size of the input.
+        Parameters:
+        - source: A binary file-like object.
+        - chunkSize: The amount of bytes read at once.
+        '''
+        if self.usesMultiDFA():
+            walk = self.getMultiDFA().walk
+        else:
+            walk = partial(walkOf, self.getMatchers())
+        decoder = codecs.getincrementaldecoder('utf-8')()
+
+        unCodified = ''
+        codified = array('I')
+        # Position of unCodified[0] in the whole input
+        offset = 0
+        forward = 0
+        exhausted = False
+
+        while True:
+            if exhausted and forward == len(codified):
+                return
+
+            # A space depends on the character after it, so the last one waits for the next chunk
+            end = len(codified) if exhausted else len(codified) - 1
+            name, length, stop = walk(codified, forward, end)
+            if stop >= end and not exhausted:
+                # The lexeme may continue in the next chunk
+                data = source.read(chunkSize)
+                exhausted = not data
+                text = decoder.decode(data, final=exhausted)
+                unCodified += text
+                codified.extend(map(ord, text))
+                continue
+
+            if length == 0:
+                self.errorsManager.addError(
+                    f'No pattern found for character \"{unCodified[forward]}\" at position \"{offset + forward}\"', 'Not all characters were tokenized')
+                return
+
+            if name not in self.skipped:
+                instrumentation.count('tokenizer.tokens')
+                yield Symbol(name, codified[forward:forward + length], unCodified[forward:forward + length], offset + forward)
+            forward += length
+
+            if forward >= chunkSize:
+                unCodified = unCodified[forward:]
+                codified = codified[forward:]
+                offset += forward
+                forward = 0
@@ -2,6 +2,8 @@ from src._tokenizer import Tokenizer
 from src.utils.patterns import Pattern
 from src.utils.constants import MATCH, EXIST, IDENT, VALUE, EXTRACT_REMINDER
 from src.utils.structures.symbol import Symbol
+from src.utils.structures.symbol_table import SymbolTable
+from src.utils.structures.reference import Reference
 from src.utils.patterns import CHAR
 from src.utils.tools import errorsManager
 
@@ -28,10 +30,31 @@ class YalSequencer(object):
             EXTRACT_REMINDER: None
         }
         self.idents: dict = {}
+        # The reference that stands for each identifier in the definitions that use it
+        self.references: dict = {}
         self.exprContains: list[Pattern] = exprContains
         self.currentIdent: str = ""
         self.extract = extract
-        self.reminders = []
+        self.reminders: SymbolTable = SymbolTable()
+
+        # The sub-lexers are built once, and reused for every symbol
+        # Patterns may share names, so each keyword matcher is kept by the step of the sequence that uses it
+        self.keywordMatchers: dict = {
+            idx: pattern.matcher for idx, (pattern, function) in enumerate(identSequence) if function == MATCH}
+        self.exprLexer: Tokenizer = None
+        if exprContains:
+            self.exprLexer = Tokenizer()
+            self.exprLexer.addPatterns(exprContains)
+
+    def reset(self):
+        '''
+        This function clears the identifiers, references, reminders and errors found, so the sequencer, with its sub-lexers ready, can walk the symbols of its lexer again.
+        '''
+        self.errorsManager.clear()
+        self.idents.clear()
+        self.references.clear()
+        self.reminders.clear()
+        self.currentIdent = ""
 
     def extractIdent(self):
         '''
@@ -72,20 +95,12 @@ class YalSequencer(object):
             return False
 
         symbol: Symbol = self.lexer.symbolsTable[symbolsPointer]
-        sequence: Pattern = self.identSequence[sequencePointer][0]
 
-        lexer = Tokenizer()
-        lexer.unCodified = symbol.original
-        lexer.codified = symbol.content
-        lexer.addPattern(sequence)
-        lexer.tokenize(True)
+        # The whole lexeme must be a single match of the keyword
+        content = symbol.content
+        _, length = self.keywordMatchers[sequencePointer].longestMatch(content)
 
-        if len(lexer.symbolsTable) == 0:
-            return False
-        if len(lexer.symbolsTable) > 1:
-            return False
-
-        return True
+        return length > 0 and length == len(content)
 
     def ident(self, symbolsPointer: int, sequencePointer: int) -> bool:
 
@@ -108,41 +123,37 @@ class YalSequencer(object):
         value = []
 
         # TODO: Here I stop, at this point I need to implement the extraction and recognition of EXPR
-        lexer = Tokenizer()
-        lexer.unCodified = symbol.original
-        lexer.codified = symbol.content
-        lexer.addPatterns(self.exprContains)
-
+        lexer = self.exprLexer
+        lexer.resetSource(symbol.content, symbol.original)
         lexer.tokenize(False)
 
         if len(lexer.symbolsTable) > 0:
             for subSymbol in lexer.symbolsTable:
                 if subSymbol.type == self.extract.name:
-                    # Get the definition of the symbol, using the identifier. An looking on idents.
-                    get_original = self.idents.get(subSymbol.original, None)
+                    # The identifier is kept as a reference to its definition, it is not expanded
+                    reference = self.references.get(subSymbol.original, None)
 
-                    if get_original is None:
+                    if reference is None:
                         self.errorsManager.addError(
                             f'Previous definition of \"{subSymbol.original}\" not found',
                             f'Cant compose the value for the identity \"{self.currentIdent}\".'
                         )
                         return False
 
-                    value.extend(
-                        get_original
-                    )
+                    value.append(reference)
                 else:
                     value.extend(subSymbol.original)
 
         self.idents[self.currentIdent] = value
+        self.references[self.currentIdent] = Reference(
+            self.currentIdent, value)
 
         return True
 
     def exist(self, symbolsPointer: int, sequencePointer: int) -> bool:
         pattern: Pattern = self.identSequence[sequencePointer][0]
-        symbol: Symbol = self.lexer.symbolsTable[symbolsPointer]
 
-        if pattern.name != symbol.type:
+        if pattern.name != self.lexer.symbolsTable.typeOf(symbolsPointer):
             return False
 
         return True
@@ -1,5 +1,7 @@
 from src.utils.structures.state import State
 from src.utils.structures.transition import Transition
+from src.utils.constants import WS, WS_CODE, SINGLE_QUOTE_CODE, UNQUOTED_WS_CODE
+from src.utils.instrumentation import instrumentation
 from graphviz import Digraph
 import time
 
@@ -14,8 +16,22 @@ class Automaton(object):
         self.initialState: State = None
         self.acceptanceStates: list[State] = []
         self.transitions: list[Transition] = []
+        self.acceptanceLabels: dict = {}
+        # Maps each symbol to its equivalence class, when the transitions use class ids instead of symbols
+        self.classOf: dict = None
         self.simulationTime: float = 0
 
+        # Dense transition table, filled by freeze()
+        self.stateIndex: dict = {}
+        self.columns: dict = {}
+        self.byteClasses: list[int] = []
+        self.table: list[list[int]] = None
+        self.accepting: list[bool] = []
+        self.labels: list = []
+        self.dead: list[bool] = []
+        # NumPy copy of the dense table, filled by simulateBatch()
+        self.batchTables: tuple = None
+
     def preprocess(self):
         '''
         This method is made for preprocess the automaton.
@@ -40,6 +56,107 @@ class Automaton(object):
         '''
         raise NotImplementedError()
 
+    def freeze(self):
+        '''
+        This method is made for freeze the automaton into a dense transition table.
+
+        Each state gets a row and each symbol of the alphabet gets a column, so every step of the simulation is a constant time lookup instead of a scan over the transitions. A missing transition is stored as -1.
+        When the automaton is built over equivalence classes, each class gets a column and every symbol of the class is mapped to it.
+        byteClasses maps the integer symbols of the codified input (character codes and UNQUOTED_WS_CODE) to their column, -1 if the automaton does not use them.
+        Transitions to dead states, from which no acceptance state can be reached, are also stored as -1 so walks stop as soon as the match can not grow.
+        '''
+        self.stateIndex = {state.id: idx for idx,
+                           state in enumerate(self.states)}
+        self.batchTables = None
+
+        usingColumns = {}
+        for transition in self.transitions:
+            if transition.using not in usingColumns:
+                usingColumns[transition.using] = len(usingColumns)
+
+        if self.classOf:
+            self.columns = {symbol: usingColumns[symbolClass] for symbol, symbolClass in self.classOf.items()
+                            if symbolClass in usingColumns}
+        else:
+            self.columns = usingColumns
+
+        self.byteClasses = self.byteClassesOf(self.columns)
+
+        self.table = [[-1] * len(usingColumns) for _ in self.states]
+        for transition in self.transitions:
+            self.table[self.stateIndex[transition.tail_id]][usingColumns[transition.using]] = self.stateIndex[transition.head_id]
+
+        acceptanceIds = set(state.id for state in self.acceptanceStates)
+        self.accepting = [
+            state.id in acceptanceIds for state in self.states]
+        self.labels = [self.acceptanceLabels.get(
+            state.id) for state in self.states]
+
+        # Walk the transitions backwards from the acceptance states, whatever is not reached is dead.
+        predecessors = [[] for _ in self.states]
+        for row, targets in enumerate(self.table):
+            for target in targets:
+                if target >= 0:
+                    predecessors[target].append(row)
+
+        alive = self.accepting[:]
+        stack = [row for row, accepting in enumerate(alive) if accepting]
+        while stack:
+            row = stack.pop()
+            for predecessor in predecessors[row]:
+                if not alive[predecessor]:
+                    alive[predecessor] = True
+                    stack.append(predecessor)
+        self.dead = [not isAlive for isAlive in alive]
+
+        for targets in self.table:
+            for column, target in enumerate(targets):
+                if target >= 0 and self.dead[target]:
+                    targets[column] = -1
+
+    def byteClassesOf(self, columns: dict) -> list[int]:
+        '''
+        This method is made for map the integer symbols of the codified input to the columns of their labels.
+        Parameters:
+        - columns: The column of each label of the alphabet.
+        Returns:
+        - The column of each integer symbol (character codes and UNQUOTED_WS_CODE), -1 if the automaton does not use it.
+        '''
+        byteClasses = [-1] * (UNQUOTED_WS_CODE + 1)
+        for symbol, column in columns.items():
+            if symbol == WS:
+                byteClasses[UNQUOTED_WS_CODE] = column
+            elif isinstance(symbol, str) and symbol.isdigit() and int(symbol) < UNQUOTED_WS_CODE:
+                byteClasses[int(symbol)] = column
+        return byteClasses
+
+    def classLabels(self) -> dict:
+        '''
+        This method is made for label the classes of the automaton with the symbols they hold, for drawing. Runs of consecutive codes are written as ranges.
+        Returns:
+        - The label of each class, empty when the transitions use symbols.
+        '''
+        members = {}
+        for symbol, symbolClass in (self.classOf or {}).items():
+            members.setdefault(symbolClass, []).append(symbol)
+
+        labels = {}
+        for symbolClass, symbols in members.items():
+            codes = sorted(int(symbol) for symbol in symbols
+                           if isinstance(symbol, str) and symbol.isdigit())
+            parts = []
+            for code in codes:
+                if parts and parts[-1][1] == code - 1:
+                    parts[-1][1] = code
+                else:
+                    parts.append([code, code])
+            texts = [str(first) if first == last else f'{first}-{last}'
+                     for first, last in parts]
+            texts.extend(sorted(str(symbol) for symbol in symbols
+                                if not (isinstance(symbol, str) and symbol.isdigit())))
+            labels[symbolClass] = ', '.join(texts)
+        return labels
+
     def draw(self, name: str, id: int, label: str = None):
         '''
         This method is made for draw the automaton.
@@ -56,10 +173,11 @@ class Automaton(object):
         # Draw the special start indicator
         dot.node('start', 'start', shape='point', color='transparent')
 
-        # Draw the transitions
+        # Draw the transitions, a class is drawn as the symbols it holds
+        classLabels = self.classLabels()
         for transition in self.transitions:
             dot.edge(str(transition.tail_id), str(
-                transition.head_id), str(transition.using))
+                transition.head_id), classLabels.get(transition.using, str(transition.using)))
 
         # Draw the states
         for state in self.states:
@@ -74,20 +192,191 @@ class Automaton(object):
 
         dot.render(f'output/{id}/{name}', format='png', cleanup=True)
 
-    def simulate(self, input: list):
+    def simulate(self, input: bytes, start: int = 0, end: int = None):
         '''
         This method is made for simulate the automaton.
+        Parameters:
+        - input: The codified input, a sequence of integer symbols (bytes, bytearray, memoryview, array), it is walked in place.
+        - start: The offset of the input where the simulation begins.
+        - end: The offset where the simulation ends, the end of the input by default.
+        Returns:
+        - If the automaton accepts, and the amount of characters consumed from start.
         '''
+        if self.table is None:
+            self.freeze()
+
         start_time = time.perf_counter()
-        statePointer = self.initialState.id
-        for idx, c in enumerate(input):
-            found = False
-            for transition in self.transitions:
-                if transition.tail_id == statePointer and transition.using == c:
-                    statePointer = transition.head_id
-                    found = True
-                    break
-            if not found:
-                return False, idx
+        table = self.table
+        byteClasses = self.byteClasses
+        size = len(input)
+        end = size if end is None else end
+        row = self.stateIndex[self.initialState.id]
+        accepted = False
+        consumed = end - start
+        for idx in range(start, end):
+            symbol = input[idx]
+            if symbol == WS_CODE:
+                if not (0 < idx < size - 1 and input[idx - 1] == SINGLE_QUOTE_CODE and input[idx + 1] == SINGLE_QUOTE_CODE):
+                    symbol = UNQUOTED_WS_CODE
+            elif symbol >= UNQUOTED_WS_CODE:
+                consumed = idx - start
+                break
+            column = byteClasses[symbol]
+            if column < 0:
+                consumed = idx - start
+                break
+            row = table[row][column]
+            if row < 0:
+                consumed = idx - start
+                break
+        else:
+            accepted = self.accepting[row]
         self.simulationTime = time.perf_counter() - start_time
-        return statePointer in [state.id for state in self.acceptanceStates], len(input)
+        if instrumentation.enabled:
+            instrumentation.count('automaton.steps', consumed)
+        return accepted, consumed
+
+    def longestMatch(self, input: bytes, start: int = 0, end: int = None) -> tuple:
+        '''
+        This method is made for find the longest prefix of the input, from the start offset, accepted by the automaton.
+        Parameters:
+        - input: The codified input, a sequence of integer symbols, it is walked in place.
+        - start: The offset of the input where the match begins.
+        - end: The offset where the match must end at most, the end of the input by default.
+        Returns:
+        - The label of the accepting state reached (None for unlabeled automata) and the length of the prefix, or (None, 0) if no prefix is accepted.
+        '''
+        label, length, _ = self.walk(input, start, end)
+        return label, length
+
+    def walk(self, input: bytes, start: int = 0, end: int = None) -> tuple:
+        '''
+        This method is made for walk the input from the start offset looking for the longest accepted prefix.
+        The walk keeps track of the last acceptance state seen, and stops as soon as the automaton gets stuck or enters a dead state.
+        A space is an UNQUOTED_WS_CODE symbol unless the characters around it, even beyond start and end, are single quotes.
+        Returns:
+        - The label and length of the longest accepted prefix, as in longestMatch, and the index where the walk stopped. When it is the end, the match could still grow with more input.
+        '''
+        if self.table is None:
+            self.freeze()
+
+        table = self.table
+        byteClasses = self.byteClasses
+        accepting = self.accepting
+        size = len(input)
+        end = size if end is None else end
+        row = self.stateIndex[self.initialState.id]
+        label = None
+        length = 0
+        stop = end
+        if self.dead[row]:
+            stop = start
+        else:
+            for idx in range(start, end):
+                symbol = input[idx]
+                if symbol == WS_CODE:
+                    if not (0 < idx < size - 1 and input[idx - 1] == SINGLE_QUOTE_CODE and input[idx + 1] == SINGLE_QUOTE_CODE):
+                        symbol = UNQUOTED_WS_CODE
+                elif symbol >= UNQUOTED_WS_CODE:
+                    stop = idx
+                    break
+                column = byteClasses[symbol]
+                if column < 0:
+                    stop = idx
+                    break
+                row = table[row][column]
+                if row < 0:
+                    stop = idx
+                    break
+                if accepting[row]:
+                    label = self.labels[row]
+                    length = idx + 1 - start
+        if instrumentation.enabled:
+            instrumentation.count('automaton.steps', stop - start)
+        return label, length, stop
+
+    def batchArrays(self):
+        '''
+        This method is made for copy the dense table into NumPy arrays for simulateBatch.
+        A sink row and a sink column are added so that missing transitions and unused symbols can be looked up like any other.
+        Returns:
+        - The transition matrix, the column of every integer symbol, and the acceptance flag of every row.
+        '''
+        import numpy as np
+
+        if self.table is None:
+            self.freeze()
+
+        if self.batchTables is None:
+            sink = len(self.states)
+            noColumn = len(self.table[0]) if self.table else 0
+            matrix = np.full((sink + 1, noColumn + 1), sink, dtype=np.int32)
+            if noColumn:
+                matrix[:sink, :noColumn] = np.array(self.table, dtype=np.int32)
+            matrix[matrix < 0] = sink
+
+            byteClasses = np.array(self.byteClasses, dtype=np.int32)
+            byteClasses[byteClasses < 0] = noColumn
+
+            accepting = np.zeros(sink + 1, dtype=bool)
+            accepting[:sink] = self.accepting
+
+            self.batchTables = (matrix, byteClasses, accepting)
+        return self.batchTables
+
+    def simulateBatch(self, inputs, lengths=None) -> tuple:
+        '''
+        This method is made for simulate the automaton over many inputs at once, all of them advance in lockstep through a NumPy transition matrix.
+        Requires NumPy.
+        Parameters:
+        - inputs: A list of bytes, or a 2-D uint8 array with one input per row padded with zeros.
+        - lengths: The length of each row of a 2-D array, the whole row by default. Ignored for a list of bytes.
+        Returns:
+        - A bool array telling if each whole input is accepted, and an int array with the length of the longest accepted prefix of each input (0 when there is none).
+        '''
+        import numpy as np
+
+        matrix, byteClasses, accepting = self.batchArrays()
+
+        if isinstance(inputs, np.ndarray):
+            codified = np.asarray(inputs, dtype=np.uint8)
+            if codified.ndim != 2:
+                raise ValueError('The batch must be a 2-D array')
+            lengths = np.full(codified.shape[0], codified.shape[1], dtype=np.int64) if lengths is None else np.asarray(lengths, dtype=np.int64)
+            active = np.arange(codified.shape[1])[np.newaxis, :] < lengths[:, np.newaxis]
+        else:
+            # The mask of the padded rows, in row order, lines up with the joined inputs
+            lengths = np.fromiter(map(len, inputs), dtype=np.int64, count=len(inputs))
+            active = np.arange(int(lengths.max(initial=0)))[np.newaxis, :] < lengths[:, np.newaxis]
+            codified = np.zeros(active.shape, dtype=np.uint8)
+            codified[active] = np.frombuffer(b''.join(inputs), dtype=np.uint8)
+
+        count, size = codified.shape
+
+        # A space is UNQUOTED_WS_CODE unless it is between single quotes of the same input, as in walk.
+        symbols = codified.astype(np.int32)
+        spaces = (codified == WS_CODE) & active
+        quoted = np.zeros_like(spaces)
+        if size > 2:
+            quoted[:, 1:-1] = (codified[:, :-2] == SINGLE_QUOTE_CODE) & (codified[:, 2:] == SINGLE_QUOTE_CODE) & active[:, 2:]
+        symbols[spaces & ~quoted] = UNQUOTED_WS_CODE
+        symbolColumns = byteClasses[symbols]
+
+        # Only the inputs that are neither finished nor stuck are stepped
+        sink = matrix.shape[0] - 1
+        width = matrix.shape[1]
+        flatMatrix = matrix.ravel()
+        symbolColumns = np.ascontiguousarray(symbolColumns.T)
+        rows = np.full(count, self.stateIndex[self.initialState.id], dtype=np.int64)
+        matchLengths = np.zeros(count, dtype=np.int64)
+        live = np.flatnonzero(lengths > 0)
+        for column in range(symbolColumns.shape[0]):
+            live = live[lengths[live] > column]
+            if live.size == 0:
+                break
+            targets = flatMatrix[rows[live] * width + symbolColumns[column, live]]
+            rows[live] = targets
+            matchLengths[live[accepting[targets]]] = column + 1
+            live = live[targets != sink]
+
+        return accepting[rows], matchLengths
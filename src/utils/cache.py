@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+
+from src.models._automaton import Automaton
+from src.utils.constants import CACHE_FORMAT_VERSION, CACHE_DIR_ENV
+from src.utils.structures.state import State
+from src.utils.structures.transition import Transition
+
+
+def cacheDirectory() -> str:
+    '''
+    This function returns the directory where the compiled automata are stored.
+    It can be changed with the XCOMPI_CACHE_DIR environment variable, an empty value disables the cache.
+    '''
+    return os.environ.get(
+        CACHE_DIR_ENV,
+        os.path.join(os.path.expanduser('~'), '.cache', 'xcompi-c')
+    )
+
+
+def cacheKey(pattern: str) -> str:
+    '''
+    This function returns the content address of a pattern, based on its text and the cache format version.
+    '''
+    content = f'{CACHE_FORMAT_VERSION}\0{pattern}'.encode('utf-8')
+    return hashlib.sha256(content).hexdigest()
+
+
+def cachePath(pattern: str) -> str:
+    '''
+    This function returns the file where the automaton of the pattern is stored, or None if the cache is disabled.
+    '''
+    directory = cacheDirectory()
+    if not directory:
+        return None
+    return os.path.join(directory, f'{cacheKey(pattern)}.json')
+
+
+def serializeAutomaton(automaton: Automaton, positions: int = None) -> dict:
+    '''
+    This function returns a compact representation of the automaton.
+    Parameters:
+    - automaton: The automaton.
+    - positions: The amount of positions of the regular expression the automaton was built from.
+    '''
+    return {
+        'version': CACHE_FORMAT_VERSION,
+        'positions': positions,
+        'states': [state.id for state in automaton.states],
+        'initial': automaton.initialState.id,
+        'acceptance': [state.id for state in automaton.acceptanceStates],
+        'transitions': [[transition.tail_id, transition.head_id, transition.using]
+                        for transition in automaton.transitions],
+        'classes': automaton.classOf,
+    }
+
+
+def deserializeAutomaton(data: dict) -> Automaton:
+    '''
+    This function rebuilds a frozen automaton from its compact representation.
+    '''
+    automaton = Automaton()
+    automaton.states = [State(id, id) for id in data['states']]
+    states = {state.id: state for state in automaton.states}
+
+    automaton.initialState = states[data['initial']]
+    automaton.initialState.initial = True
+    for id in data['acceptance']:
+        states[id].acceptance = True
+        automaton.acceptanceStates.append(states[id])
+
+    automaton.transitions = [Transition(tail_id, head_id, using)
+                             for tail_id, head_id, using in data['transitions']]
+    automaton.classOf = data['classes']
+    automaton.freeze()
+    return automaton
+
+
+def loadAutomaton(pattern: str) -> tuple[Automaton, int]:
+    '''
+    This function returns the cached automaton of the pattern and the amount of positions of its regular expression, or None if it is not cached or the entry can not be read.
+    '''
+    path = cachePath(pattern)
+    if path is None:
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != CACHE_FORMAT_VERSION:
+            return None
+        return deserializeAutomaton(data), data['positions']
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def storeAutomaton(pattern: str, automaton: Automaton, positions: int = None) -> None:
+    '''
+    This function stores the automaton of the pattern, and the amount of positions of its regular expression, in the cache. Failures are ignored, the cache is only an optimization.
+    '''
+    path = cachePath(pattern)
+    if path is None:
+        return
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(serializeAutomaton(automaton, positions), f,
+                      separators=(',', ':'))
+        os.replace(temporary, path)
+    except OSError:
+        pass
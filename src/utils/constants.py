@@ -36,3 +36,42 @@ EXIST = 'EXIST'
 EXTRACT_REMINDER = 'EXTRACT_REMINDER'
 
 UNIVERSE = set(str(i) for i in range(256))
+
+# Integer symbols of the codified input. A space between single quotes is its character code, any other space is UNQUOTED_WS_CODE, as in softCodify.
+WS_CODE = 32
+SINGLE_QUOTE_CODE = 39
+UNQUOTED_WS_CODE = 256
+
+STREAM_CHUNK_SIZE = 1 << 16
+# Amount of characters lexed by each task of the parallel tokenizer
+PARALLEL_CHUNK_SIZE = 1 << 18
+
+CACHE_FORMAT_VERSION = 3
+CACHE_DIR_ENV = 'XCOMPI_CACHE_DIR'
+
+HOPCROFT = 'HOPCROFT'
+MOORE = 'MOORE'
+
+# Engines a pattern can be matched with, AUTO picks BIT_PARALLEL for patterns of at most BIT_PARALLEL_MAX_POSITIONS positions, EAGER otherwise
+EAGER = 'EAGER'
+LAZY = 'LAZY'
+BIT_PARALLEL = 'BIT_PARALLEL'
+AUTO = 'AUTO'
+# Bits of the machine word the masks of the bit-parallel engine must fit in
+MACHINE_WORD_BITS = 64
+# The masks also hold bit 0, which no position uses, and the bit of the terminator
+BIT_PARALLEL_MAX_POSITIONS = MACHINE_WORD_BITS - 2
+# Bits of the positions mask looked up at once when following the positions of the bit-parallel engine
+BIT_PARALLEL_BLOCK = 8
+# Amount of states the lazy DFA keeps before flushing its cache
+LAZY_DFA_CACHE_SIZE = 1 << 12
+
+# Op codes of the nodes of the flat abstract syntax tree
+SYMBOL_NODE = 0
+EPSILON_NODE = 1
+OR_NODE = 2
+CONCAT_NODE = 3
+KLEENE_STAR_NODE = 4
+ONE_OR_MORE_NODE = 5
+ZERO_OR_ONE_NODE = 6
+TERMINATOR_NODE = 7
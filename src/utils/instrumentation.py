@@ -0,0 +1,122 @@
+import json
+import time
+from contextlib import nullcontext
+
+# Shared by every span while the instrumentation is disabled, so a disabled span costs a single check
+NO_SPAN = nullcontext()
+
+
+class Span(object):
+    '''
+    This class represents a named span of time, it adds its duration to the report when it ends.
+    '''
+
+    __slots__ = ('owner', 'name', 'start')
+
+    def __init__(self, owner: 'Instrumentation', name: str):
+        '''
+        This is the constructor of the class.
+        Parameters:
+        - owner: The instrumentation the span reports to.
+        - name: The name of the span.
+        '''
+        self.owner: Instrumentation = owner
+        self.name: str = name
+        self.start: float = None
+
+    def __enter__(self) -> 'Span':
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exception) -> None:
+        self.owner.addTime(self.name, time.perf_counter() - self.start)
+
+
+class Instrumentation(object):
+    '''
+    This class represents the instrumentation of the pipeline: named spans of time and counters.
+    It is disabled by default, then spans and counters do nothing.
+    '''
+
+    def __init__(self):
+        '''
+        This is the constructor of the class.
+        '''
+        self.enabled: bool = False
+        # Name -> [calls, seconds], in order of first use
+        self.spans: dict = {}
+        self.counters: dict = {}
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        self.spans = {}
+        self.counters = {}
+
+    def span(self, name: str) -> Span:
+        '''
+        This function returns a context manager that measures the time of its block under the given name.
+        '''
+        if not self.enabled:
+            return NO_SPAN
+        return Span(self, name)
+
+    def addTime(self, name: str, seconds: float) -> None:
+        '''
+        This function adds a call of the given duration to a span.
+        '''
+        span = self.spans.get(name)
+        if span is None:
+            self.spans[name] = [1, seconds]
+        else:
+            span[0] += 1
+            span[1] += seconds
+
+    def count(self, name: str, amount: int = 1) -> None:
+        '''
+        This function adds the amount to a counter.
+        '''
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def merge(self, report: dict) -> None:
+        '''
+        This function adds the spans and counters of a report, as report returns it, to the ones collected.
+        '''
+        for name, span in report['spans'].items():
+            current = self.spans.setdefault(name, [0, 0.0])
+            current[0] += span['calls']
+            current[1] += span['seconds']
+        for name, value in report['counters'].items():
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def report(self) -> dict:
+        '''
+        This function returns the spans and counters collected.
+        '''
+        return {
+            'spans': {name: {'calls': calls, 'seconds': seconds} for name, (calls, seconds) in self.spans.items()},
+            'counters': dict(self.counters),
+        }
+
+    def printReport(self, format: str = 'table') -> None:
+        '''
+        This function prints the spans and counters collected, as a table or as JSON.
+        '''
+        if format == 'json':
+            print(json.dumps(self.report(), indent=2))
+            return
+
+        print(f'{"span":<40} {"calls":>8} {"seconds":>12}')
+        for name, (calls, seconds) in self.spans.items():
+            print(f'{name:<40} {calls:>8} {seconds:>12.6f}')
+        print(f'{"counter":<40} {"value":>8}')
+        for name, value in self.counters.items():
+            print(f'{name:<40} {value:>8}')
+
+
+instrumentation = Instrumentation()
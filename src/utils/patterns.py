@@ -1,8 +1,13 @@
 from src._expression import Expression
-from src._ast import AbstractSyntaxTree as AST
+from src._ast import AbstractSyntaxTree as AST, FlatAbstractSyntaxTree as FlatAST
 from src._dir_dfa import DirectDeterministicFiniteAutomaton as DirDFA
 from src._min_dfa import MinimizedDeterministicFiniteAutomaton as MinDFA
-from src.utils.constants import LPAREN, RPAREN, OR, KLEENE_STAR, ONE_OR_MORE
+from src._lazy_dfa import LazyDeterministicFiniteAutomaton as LazyDFA
+from src._bit_parallel import BitParallelAutomaton
+from src.utils.constants import LPAREN, RPAREN, OR, KLEENE_STAR, ONE_OR_MORE, EAGER, LAZY, BIT_PARALLEL, AUTO, BIT_PARALLEL_MAX_POSITIONS, SYMBOL_NODE
+from src.utils.cache import loadAutomaton, storeAutomaton
+from src.utils.instrumentation import instrumentation
+from src.utils.structures.reference import definitionKey
 
 
 class Pattern(object):
@@ -12,15 +17,120 @@ class Pattern(object):
 
     def __init__(self,
                  name: str,
-                 pattern: str) -> None:
-
+                 pattern: str | list,
+                 engine: str = AUTO) -> None:
+        '''
+        This is the constructor of the class.
+        Parameters:
+        - name: The name of the pattern, it labels its symbols.
+        - pattern: The regular expression, as text or as a list of characters and references to definitions.
+        - engine: How the pattern is matched: EAGER builds the whole minimized DFA, LAZY builds the states while the input is walked, BIT_PARALLEL simulates the positions of the expression at once. AUTO (default) picks BIT_PARALLEL for small patterns and EAGER otherwise, the first time the pattern is matched.
+        '''
         self.name: str = name
-        self.pattern: str = pattern
-        self.build(0)
+        self.pattern: str | list = pattern
+        self.engine: str = engine
+        self.expr: Expression = None
+        self.ast: AST = None
+        self.flat_ast: FlatAST = None
+        self.dir_dfa: DirDFA = None
+        # The automaton is built on first use, see min_dir_dfa
+        self.automaton: MinDFA = None
+        self.lazy_dfa: LazyDFA = None
+        self.bit_parallel: BitParallelAutomaton = None
+        # Amount of positions of the expression, known once it is parsed or loaded from the on-disk cache
+        self.positions: int = None
+
+    @property
+    def min_dir_dfa(self) -> MinDFA:
+        '''
+        The minimized DFA of the pattern, it is built the first time it is needed.
+        '''
+        if self.automaton is None:
+            self.build(0)
+        return self.automaton
+
+    @property
+    def matcher(self) -> MinDFA | LazyDFA:
+        '''
+        The automaton the pattern is matched with, as its engine says. Both have simulate, longestMatch and walk.
+        '''
+        if self.engine == AUTO:
+            self.engine = self.pickEngine()
+        if self.engine == LAZY:
+            if self.lazy_dfa is None:
+                if self.flat_ast is None:
+                    self.parse()
+                self.lazy_dfa = LazyDFA(self.flat_ast)
+            return self.lazy_dfa
+        if self.engine == BIT_PARALLEL:
+            if self.bit_parallel is None:
+                if self.flat_ast is None:
+                    self.parse()
+                self.bit_parallel = BitParallelAutomaton(self.flat_ast)
+            return self.bit_parallel
+        return self.min_dir_dfa
+
+    def pickEngine(self) -> str:
+        '''
+        This function picks the engine of the pattern: BIT_PARALLEL when its masks, its positions plus bit 0 and the terminator, fit in a machine word, EAGER otherwise.
+        The amount of positions is taken from the on-disk cache when the pattern was already compiled, the expression is only parsed otherwise.
+        '''
+        if self.positions is None and self.automaton is None:
+            self.load()
+        if self.positions is None:
+            self.parse()
+        return BIT_PARALLEL if self.positions <= BIT_PARALLEL_MAX_POSITIONS else EAGER
+
+    def precompile(self) -> 'Pattern':
+        '''
+        This function builds the automata of the pattern ahead of their first use: its matcher and, unless the pattern is LAZY, its minimized DFA, which the multi-pattern automaton is built from.
+        A LAZY pattern is never walked in a multi-pattern automaton, so its whole DFA is not built.
+        '''
+        # The properties build them, the matcher first so AUTO is resolved
+        self.matcher
+        if self.engine != LAZY:
+            self.min_dir_dfa
+        return self
 
     def build(self, idx: int) -> None:
         '''
-        This function builds the DFA for the pattern.
+        This function builds the DFA for the pattern, loading it from the on-disk cache when it was already compiled.
+        '''
+        with instrumentation.span('pattern.build'):
+            if not self.load():
+                instrumentation.count('pattern.compiled')
+                self.compile()
+                storeAutomaton(definitionKey(self.pattern),
+                               self.automaton, self.positions)
+
+    def load(self) -> bool:
+        '''
+        This function loads the DFA of the pattern, and the amount of positions of its expression, from the on-disk cache.
+        Returns:
+        - True if the pattern was cached.
+        '''
+        cached = loadAutomaton(definitionKey(self.pattern))
+        if cached is None:
+            return False
+        instrumentation.count('pattern.cached')
+        self.automaton, self.positions = cached
+        return True
+
+    def compile(self) -> None:
+        '''
+        This function runs the whole pipeline for the pattern: Expression -> AST -> DirDFA -> MinDFA.
+        The DirDFA is built from the flat AST, the TreeNode AST is only built to draw it. The expression is not parsed again when a matcher already did.
+        '''
+        if self.flat_ast is None:
+            self.parse()
+
+        self.dir_dfa = DirDFA(self.flat_ast)
+
+        self.automaton = MinDFA(self.dir_dfa, self.dir_dfa.alphabet)
+
+    def parse(self) -> None:
+        '''
+        This function processes the regular expression of the pattern into its flat AST.
         '''
         # TODO: errors manager
         self.expr = Expression(self.pattern)
@@ -39,13 +149,15 @@ class Pattern(object):
             self.expr.infixRegEx
         )
 
-        self.ast = AST(self.expr.infixRegEx)
-
-        self.dir_dfa = DirDFA(self.ast.root.deepCopy())
-
-        self.min_dir_dfa = MinDFA(self.dir_dfa, self.ast.alphabet)
+        self.flat_ast = FlatAST(self.expr.infixRegEx)
+        self.positions = sum(
+            1 for op in self.flat_ast.ops if op == SYMBOL_NODE)
 
     def draw(self, idx: int) -> None:
+        if self.dir_dfa is None:
+            self.compile()
+        if self.ast is None:
+            self.ast = AST(self.expr.infixRegEx)
         self.ast.draw(f'{self.name}_AST', idx, f'{self.name} AST')
         self.dir_dfa.draw(f'{self.name}_DIR_DFA', idx, f'{self.name} DIR DFA')
 
@@ -126,3 +238,14 @@ STR = Pattern(
     'STR',
     f"(['A'-'Z''a'-'z''0'-'9'' ']|\\\'|\\\"|\\\\|\-|\+)+"
 )
+
+
+def precompile(patterns: list[Pattern] = None) -> None:
+    '''
+    This function builds the automata of the given patterns, or of every pattern of this module, ahead of their first use: their matchers and, but for LAZY patterns, their minimized DFAs.
+    '''
+    if patterns is None:
+        patterns = [value for value in globals().values()
+                    if isinstance(value, Pattern)]
+    for pattern in patterns:
+        pattern.precompile()
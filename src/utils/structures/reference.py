@@ -0,0 +1,86 @@
+import hashlib
+
+from src._expression import Expression
+from src._ast import AbstractSyntaxTree as AST, FlatAbstractSyntaxTree as FlatAST
+
+
+class Reference(object):
+    '''
+    This class represents a reference to the definition of an identifier, the same object stands for the identifier wherever it is used.
+    The definition is processed once, to postfix and to a flat AST, every use instantiates that flat AST as a template, so positions stay distinct.
+    A reference binds as a group, as if its definition was between parentheses.
+    '''
+
+    def __init__(self, name: str, definition: list):
+        '''
+        This is the constructor of the class.
+        Parameters:
+        - name: The name of the identifier.
+        - definition: The definition in infix notation, as characters and references to other identifiers.
+        '''
+        self.name: str = name
+        self.definition: list = definition
+        self.postfix: list = None
+        self.tree: FlatAST = None
+        self.ast: AST = None
+        # If every operator of the definition has its operands, None until it is validated
+        self.valid: bool = None
+        self.key: str = None
+
+    def __str__(self) -> str:
+        return self.name
+
+    def __repr__(self) -> str:
+        return f'Reference({self.name})'
+
+    def getPostfix(self) -> list:
+        '''
+        This function returns the definition in postfix notation, the references it holds are kept as operands.
+        '''
+        if self.postfix is None:
+            expr = Expression(self.definition)
+            expr.hardProcess()
+            self.postfix = expr.infixRegEx
+        return self.postfix
+
+    def getTree(self) -> FlatAST:
+        '''
+        This function returns the flat AST of the definition, the template every use instantiates.
+        '''
+        if self.tree is None:
+            self.tree = FlatAST(self.getPostfix())
+        return self.tree
+
+    def isValid(self) -> bool:
+        '''
+        This function tells if every operator of the definition, and of the definitions it uses, has its operands. It is checked once, without instantiating any tree.
+        '''
+        if self.valid is None:
+            self.valid = FlatAST().validate(self.getPostfix())
+        return self.valid
+
+    def getAbstractSyntaxTree(self) -> AST:
+        '''
+        This function returns the AST of the definition, its root is shared by every tree the reference is used in.
+        '''
+        if self.ast is None:
+            self.ast = AST(self.getPostfix())
+        return self.ast
+
+    def getKey(self) -> str:
+        '''
+        This function returns the content address of the definition, the references it holds contribute their own keys.
+        '''
+        if self.key is None:
+            self.key = hashlib.sha256(
+                definitionKey(self.definition).encode('utf-8')).hexdigest()
+        return self.key
+
+
+def definitionKey(definition: str | list) -> str:
+    '''
+    This function returns the text that identifies a definition, a reference is written as its key between null characters.
+    '''
+    if isinstance(definition, str):
+        return definition
+    return ''.join(c if isinstance(c, str) else f'\0{c.getKey()}\0' for c in definition)
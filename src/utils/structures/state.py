@@ -3,6 +3,8 @@ class State(object):
     State class for a state in a finite automaton
     '''
 
+    __slots__ = ('value', 'marked', 'id', 'acceptance', 'initial')
+
     def __init__(self, value, id=None, initial=False, acceptance=False):
         self.value = value
         self.marked = False
@@ -6,17 +6,57 @@ class Symbol(object):
     This class represents a symbol.
     '''
 
-    def __init__(self, type: str, content: str, original: str, position: int = None):
+    __slots__ = ('type', 'codifiedSource', 'originalSource', 'position', 'end')
+
+    def __init__(self, type: str, content: bytes, original: str, position: int = None, end: int = None):
         '''
         This is the constructor of the class.
         Parameters:
-        - name: The name of the symbol.
-        - lexeme: The lexeme of the symbol.
+        - type: The name of the pattern of the symbol.
+        - content: The codified lexeme, or the whole codified source when end is given.
+        - original: The original lexeme, or the whole original source when end is given.
+        - position: The position of the lexeme in the source.
+        - end: The end of the lexeme in the source. When it is given the lexeme is kept as offsets over the sources, and only sliced when it is read.
         '''
         self.type: str = type
-        self.content: str = content
-        self.original: str = original
+        self.codifiedSource: bytes = content
+        self.originalSource: str = original
         self.position: int = position
+        self.end: int = end
+
+    @property
+    def content(self) -> bytes:
+        '''
+        The codified lexeme, as integer symbols.
+        '''
+        if self.end is None:
+            return self.codifiedSource
+        return self.codifiedSource[self.position:self.end]
+
+    @property
+    def original(self) -> str:
+        '''
+        The original lexeme, bytes sources are decoded one character per byte.
+        '''
+        original = self.originalSource if self.end is None else self.originalSource[self.position:self.end]
+        if not isinstance(original, str):
+            original = bytes(original).decode('latin-1')
+        return original
+
+    def __eq__(self, other: object) -> bool:
+        '''
+        Two symbols are equal when they have the same type and lexeme at the same position: the same offsets over the same sources, or equal lexemes when they hold their own.
+        '''
+        if not isinstance(other, Symbol):
+            return NotImplemented
+        if (self.type, self.position, self.end) != (other.type, other.position, other.end):
+            return False
+        if self.end is None:
+            return self.codifiedSource == other.codifiedSource and self.originalSource == other.originalSource
+        return self.codifiedSource is other.codifiedSource and self.originalSource is other.originalSource
+
+    def __hash__(self) -> int:
+        return hash((self.type, self.position, self.end))
 
     def __str__(self) -> str:
         '''
@@ -0,0 +1,199 @@
+from array import array
+from itertools import compress
+from collections.abc import Sequence, Iterable, Iterator
+
+from src.utils.structures.symbol import Symbol
+
+# Start of the rows of symbols without a position
+NO_POSITION = -1
+
+
+class SymbolTable(Sequence):
+    '''
+    This class represents a table of symbols kept by columns: the id of the type, and the start and end offsets over a source.
+    Types and sources are stored once, a symbol is a lightweight view over a row, created when it is read.
+    A symbol that holds its own lexeme is a whole source: its row keeps its position, and its lexeme is the whole source.
+    '''
+
+    def __init__(self, symbols: Iterable[Symbol] = ()):
+        '''
+        This is the constructor of the class.
+        Parameters:
+        - symbols: The symbols the table begins with.
+        '''
+        self.typeIds: array = array('H')
+        self.starts: array = array('q')
+        self.ends: array = array('q')
+        self.sourceIds: array = array('I')
+        self.typeNames: list[str] = []
+        self.typeIndex: dict = {}
+        # Codified source, original source, and if the source is a whole lexeme, by id
+        self.sources: list[tuple] = []
+        self.sourceIndex: dict = {}
+        self.extend(symbols)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, idx: int | slice) -> 'Symbol | SymbolTable':
+        if isinstance(idx, slice):
+            table = SymbolTable()
+            table.extendRows(self, range(*idx.indices(len(self))))
+            return table
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError('symbol table index out of range')
+        return self.view(self.typeIds[idx], self.starts[idx], self.ends[idx], self.sourceIds[idx])
+
+    def __iter__(self) -> Iterator[Symbol]:
+        view = self.view
+        for typeId, start, end, sourceId in zip(self.typeIds, self.starts, self.ends, self.sourceIds):
+            yield view(typeId, start, end, sourceId)
+
+    def view(self, typeId: int, start: int, end: int, sourceId: int) -> Symbol:
+        '''
+        This function returns the symbol of a row.
+        '''
+        codified, original, whole = self.sources[sourceId]
+        if whole:
+            return Symbol(self.typeNames[typeId], codified, original, None if start == NO_POSITION else start)
+        return Symbol(self.typeNames[typeId], codified, original, start, end)
+
+    def typeOf(self, idx: int) -> str:
+        '''
+        This function returns the type of a row, without building its view.
+        '''
+        return self.typeNames[self.typeIds[idx]]
+
+    def addType(self, typeName: str) -> int:
+        '''
+        This function returns the id of a type, registering it the first time it is seen.
+        '''
+        typeId = self.typeIndex.get(typeName)
+        if typeId is None:
+            typeId = len(self.typeNames)
+            self.typeNames.append(typeName)
+            self.typeIndex[typeName] = typeId
+        return typeId
+
+    def addSource(self, codified: bytes, original: str, whole: bool = False) -> int:
+        '''
+        This function returns the id of a source, registering it the first time it is seen. Sources are the same when they are the same objects.
+        Parameters:
+        - codified: The codified source.
+        - original: The original source.
+        - whole: If the source is the lexeme of a single symbol, its rows keep the position of the symbol instead of offsets over the source.
+        '''
+        key = (id(codified), id(original), whole)
+        sourceId = self.sourceIndex.get(key)
+        if sourceId is None:
+            sourceId = len(self.sources)
+            # The table keeps the objects alive, so their ids are not reused
+            self.sources.append((codified, original, whole))
+            self.sourceIndex[key] = sourceId
+        return sourceId
+
+    def add(self, typeName: str, start: int, end: int, sourceId: int) -> None:
+        '''
+        This function appends a row to the table.
+        Parameters:
+        - typeName: The name of the pattern of the symbol.
+        - start: The position of the lexeme in the source.
+        - end: The end of the lexeme in the source.
+        - sourceId: The id of the source, as addSource returns it.
+        '''
+        self.typeIds.append(self.addType(typeName))
+        self.starts.append(start)
+        self.ends.append(end)
+        self.sourceIds.append(sourceId)
+
+    def append(self, symbol: Symbol) -> None:
+        '''
+        This function appends a symbol to the table. A symbol that holds its own lexeme becomes a whole source of its own.
+        '''
+        self.add(symbol.type, *self.offsetsOf(symbol))
+
+    def offsetsOf(self, symbol: Symbol) -> tuple:
+        '''
+        This function returns the start, end and source id of the row of a symbol, registering its source.
+        '''
+        if symbol.end is None:
+            sourceId = self.addSource(symbol.codifiedSource, symbol.originalSource, True)
+            if symbol.position is None:
+                return NO_POSITION, NO_POSITION, sourceId
+            return symbol.position, symbol.position + len(symbol.codifiedSource), sourceId
+        sourceId = self.addSource(symbol.codifiedSource, symbol.originalSource)
+        return symbol.position, symbol.end, sourceId
+
+    def extend(self, symbols: Iterable[Symbol]) -> None:
+        '''
+        This function appends several symbols to the table, the rows of another table are copied without views.
+        '''
+        if isinstance(symbols, SymbolTable):
+            self.extendRows(symbols, range(len(symbols)))
+            return
+        for symbol in symbols:
+            self.append(symbol)
+
+    def extendRows(self, table: 'SymbolTable', rows: range) -> None:
+        '''
+        This function copies some rows of another table, their types and sources are registered in this one.
+        '''
+        typeIds = [self.addType(typeName) for typeName in table.typeNames]
+        sourceIds = [self.addSource(codified, original, whole)
+                     for codified, original, whole in table.sources]
+        for idx in rows:
+            self.typeIds.append(typeIds[table.typeIds[idx]])
+            self.starts.append(table.starts[idx])
+            self.ends.append(table.ends[idx])
+            self.sourceIds.append(sourceIds[table.sourceIds[idx]])
+
+    def clear(self) -> None:
+        '''
+        This function removes every row, and the sources, of the table. The columns are kept.
+        '''
+        del self.typeIds[:]
+        del self.starts[:]
+        del self.ends[:]
+        del self.sourceIds[:]
+        self.sources.clear()
+        self.sourceIndex.clear()
+
+    def compress(self, keep: Iterable[bool]) -> int:
+        '''
+        This function keeps only the rows whose flag is true, in a single pass over the columns.
+        Parameters:
+        - keep: A flag for each row.
+        Returns:
+        - The amount of rows removed.
+        '''
+        keep = list(keep)
+        size = len(self)
+        self.typeIds = array('H', compress(self.typeIds, keep))
+        self.starts = array('q', compress(self.starts, keep))
+        self.ends = array('q', compress(self.ends, keep))
+        self.sourceIds = array('I', compress(self.sourceIds, keep))
+        return size - len(self)
+
+    def removeTypes(self, typeNames: Iterable[str]) -> int:
+        '''
+        This function removes the rows of the given types.
+        Returns:
+        - The amount of rows removed.
+        '''
+        removed = {self.typeIndex[typeName]
+                   for typeName in typeNames if typeName in self.typeIndex}
+        if not removed:
+            return 0
+        return self.compress(typeId not in removed for typeId in self.typeIds)
+
+    def remove(self, symbol: Symbol) -> None:
+        '''
+        This function removes the first row equal to the symbol.
+        '''
+        idx = self.index(symbol)
+        del self.typeIds[idx]
+        del self.starts[idx]
+        del self.ends[idx]
+        del self.sourceIds[idx]
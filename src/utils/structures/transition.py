@@ -1,12 +1,18 @@
+import sys
+
+
 class Transition(object):
     '''
     Transition class for a transition in a finite automaton 
     '''
 
+    __slots__ = ('tail_id', 'head_id', 'using')
+
     def __init__(self, tail_id, head_id, using) -> None:
         self.tail_id = tail_id
         self.head_id = head_id
-        self.using = using
+        # Labels are interned, every transition with the same label shares its string
+        self.using = sys.intern(using) if type(using) is str else using
 
     def __str__(self) -> str:
         return f'{self.tail_id} {self.using} {self.head_id}'
@@ -3,6 +3,8 @@ class TreeNode(object):
     Node class for a binary tree data structure
     '''
 
+    __slots__ = ('value', 'right', 'left')
+
     def __init__(self, value, right=None, left=None):
         self.value = value
         self.right = right
@@ -13,30 +15,54 @@ class TreeNode(object):
 
     def postOrderTraversal(self, function: callable = None):
         '''
-        Post order traversal of the binary tree for applying a function to each node
+        Post order traversal of the binary tree for applying a function to each node.
+        It uses an explicit stack, so deep trees do not hit the recursion limit.
         Parameters:
         - function: A function to be applied to each node of the binary tree.
         '''
-        if self.left:
-            self.left.postOrderTraversal(function)
-        if self.right:
-            self.right.postOrderTraversal(function)
-        if function:
-            function(self)
+        stack = [(self, False)]
+        while stack:
+            node, visited = stack.pop()
+            if visited:
+                if function:
+                    function(node)
+                continue
+            stack.append((node, True))
+            if node.right:
+                stack.append((node.right, False))
+            if node.left:
+                stack.append((node.left, False))
+
+    def fold(self, function: callable):
+        '''
+        Post order traversal of the binary tree that combines the results of the children of each node.
+        A subtree shared by several parents is visited once for each of them.
+        Parameters:
+        - function: A function of the node and the results of its left and right children (None for a missing child), its result is the result of the node.
+        Returns:
+        - The result of the root.
+        '''
+        results = []
+        stack = [(self, False)]
+        while stack:
+            node, visited = stack.pop()
+            if visited:
+                right = results.pop() if node.right else None
+                left = results.pop() if node.left else None
+                results.append(function(node, left, right))
+                continue
+            stack.append((node, True))
+            if node.right:
+                stack.append((node.right, False))
+            if node.left:
+                stack.append((node.left, False))
+        return results.pop()
 
     def deepCopy(self):
         '''
-        Deep copy of the binary tree.
-        '''
-        if self.left:
-            left = self.left.deepCopy()
-        else:
-            left = None
-        if self.right:
-            right = self.right.deepCopy()
-        else:
-            right = None
-        return TreeNode(self.value, right, left)
+        Deep copy of the binary tree, shared subtrees are copied for each of their parents.
+        '''
+        return self.fold(lambda node, left, right: TreeNode(node.value, right, left))
 
     def getPlainRepresentation(self):
         '''
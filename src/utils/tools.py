@@ -44,6 +44,12 @@ class errorsManager(object):
         '''
         self.errors.append(Error(error, consequence))
 
+    def clear(self):
+        '''
+        This function removes all the errors of the errors list.
+        '''
+        self.errors.clear()
+
     def printErrors(self, scope: str):
         '''
         This function prints all the errors in the errors list.
@@ -80,6 +86,16 @@ def numberToLetter(number: int) -> str:
         return numberToLetter((number - 1) // 26) + numberToLetter((number - 1) % 26 + 1)
 
 
+def bitPositions(mask: int):
+    '''
+    This function yields the positions of the bits set in the mask, from the lowest to the highest.
+    '''
+    while mask:
+        lowest = mask & -mask
+        yield lowest.bit_length() - 1
+        mask ^= lowest
+
+
 def str2bool(v):
     if isinstance(v, bool):
         return v
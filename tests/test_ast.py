@@ -0,0 +1,26 @@
+from src._ast import FlatAbstractSyntaxTree as FlatAST
+from src.utils.structures.reference import Reference
+
+
+def layers(levels: int) -> Reference:
+    reference = Reference('q0', list("['a'-'z']"))
+    for level in range(1, levels):
+        reference = Reference(f'q{level}', ['(', reference, ')', '(', reference, ')'])
+    return reference
+
+
+def test_validate_does_not_instantiate_the_definitions():
+    top = layers(40)
+    tree = FlatAST()
+    assert tree.validate([top])
+    assert not tree.errorsManager.haveErrors()
+    assert len(tree) == 0
+    assert top.valid and top.tree is None
+
+
+def test_validate_reports_an_invalid_definition():
+    invalid = Reference('b', ['(', Reference('a', list("['a'-'z']")), ')', '|'])
+    tree = FlatAST()
+    assert not tree.validate([invalid])
+    assert tree.errorsManager.haveErrors()
+    assert invalid.valid is False
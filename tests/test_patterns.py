@@ -0,0 +1,24 @@
+from src.utils.constants import AUTO, BIT_PARALLEL, EAGER, BIT_PARALLEL_MAX_POSITIONS, MACHINE_WORD_BITS
+from src.utils.patterns import Pattern
+
+
+def pickEngine(positions: int) -> Pattern:
+    pattern = Pattern('WORD', 'a' * positions, AUTO)
+    pattern.engine = pattern.pickEngine()
+    return pattern
+
+
+def test_bit_parallel_masks_fit_in_a_machine_word(monkeypatch):
+    monkeypatch.setenv('XCOMPI_CACHE_DIR', '')
+    pattern = pickEngine(BIT_PARALLEL_MAX_POSITIONS)
+    assert pattern.positions == BIT_PARALLEL_MAX_POSITIONS
+    assert pattern.engine == BIT_PARALLEL
+    matcher = pattern.matcher
+    masks = matcher.classPositions + matcher.followPositions + [matcher.acceptanceMask, matcher.initialMask]
+    assert max(mask.bit_length() for mask in masks) <= MACHINE_WORD_BITS
+    assert matcher.longestMatch(b'a' * (BIT_PARALLEL_MAX_POSITIONS + 1)) == (None, BIT_PARALLEL_MAX_POSITIONS)
+
+
+def test_patterns_past_a_machine_word_are_eager(monkeypatch):
+    monkeypatch.setenv('XCOMPI_CACHE_DIR', '')
+    assert pickEngine(BIT_PARALLEL_MAX_POSITIONS + 1).engine == EAGER
@@ -0,0 +1,49 @@
+import io
+
+from src._tokenizer import Tokenizer
+from src.utils.constants import LAZY
+from src.utils.instrumentation import instrumentation
+from src.utils.patterns import Pattern
+
+# The whole DFA of (a|b)*a(a|b){14} has 2^15 states
+LONG_WINDOW = '(a|b)*a' + '(a|b)' * 14
+
+
+def buildLexer() -> tuple:
+    window = Pattern('WINDOW', LONG_WINDOW, LAZY)
+    letter = Pattern('LETTER', '(a|b)')
+    lexer = Tokenizer()
+    lexer.addPatterns([window, letter])
+    return lexer, window
+
+
+def test_stream_builds_only_the_visited_states_of_a_lazy_pattern(monkeypatch):
+    monkeypatch.setenv('XCOMPI_CACHE_DIR', '')
+    text = 'ab' * 40 + 'bbbb'
+    lexer, window = buildLexer()
+
+    instrumentation.reset()
+    instrumentation.enable()
+    try:
+        symbols = list(lexer.stream(io.BytesIO(text.encode()), chunkSize=7))
+    finally:
+        instrumentation.disable()
+
+    assert not lexer.errorsManager.haveErrors()
+    # The last 'a' followed by 14 letters ends the window one letter before the end
+    assert [(symbol.type, symbol.position, symbol.original) for symbol in symbols] == [
+        ('WINDOW', 0, text[:-1]), ('LETTER', len(text) - 1, 'b')]
+    # No whole DFA was built for the LAZY pattern, nor an automaton of all the patterns
+    assert window.automaton is None
+    assert lexer.multiDFA is None
+    assert 'dir_dfa.states' not in instrumentation.counters
+    assert 0 < instrumentation.counters['lazy_dfa.states'] <= len(text) + 1
+
+
+def test_precompile_does_not_build_the_dfa_of_a_lazy_pattern(monkeypatch):
+    monkeypatch.setenv('XCOMPI_CACHE_DIR', '')
+    window = Pattern('WINDOW', LONG_WINDOW, LAZY)
+    window.precompile()
+    assert window.lazy_dfa is not None
+    assert window.automaton is None
+    assert window.dir_dfa is None